@@ -2,29 +2,50 @@
 
 from __future__ import annotations
 
+from array import array
+from collections.abc import Mapping
+from itertools import pairwise
+from types import MappingProxyType
+
 from aria.models.errors import InvalidStateTransitionError
 from aria.models.types import SessionStatus
 
-_VALID: dict[SessionStatus, set[SessionStatus]] = {
-    SessionStatus.IDLE: {SessionStatus.RUNNING, SessionStatus.CANCELLED},
-    SessionStatus.RUNNING: {
-        SessionStatus.WAITING,
-        SessionStatus.DONE,
-        SessionStatus.FAILED,
-        SessionStatus.CANCELLED,
-    },
-    SessionStatus.WAITING: {SessionStatus.RUNNING, SessionStatus.FAILED, SessionStatus.CANCELLED},
-    SessionStatus.DONE: set(),
-    SessionStatus.FAILED: set(),
-    SessionStatus.CANCELLED: set(),
-}
+_VALID: Mapping[SessionStatus, frozenset[SessionStatus]] = MappingProxyType(
+    {
+        SessionStatus.IDLE: frozenset({SessionStatus.RUNNING, SessionStatus.CANCELLED}),
+        SessionStatus.RUNNING: frozenset(
+            {
+                SessionStatus.WAITING,
+                SessionStatus.DONE,
+                SessionStatus.FAILED,
+                SessionStatus.CANCELLED,
+            }
+        ),
+        SessionStatus.WAITING: frozenset(
+            {SessionStatus.RUNNING, SessionStatus.FAILED, SessionStatus.CANCELLED}
+        ),
+        SessionStatus.DONE: frozenset(),
+        SessionStatus.FAILED: frozenset(),
+        SessionStatus.CANCELLED: frozenset(),
+    }
+)
+_TERMINAL = frozenset({SessionStatus.DONE, SessionStatus.FAILED, SessionStatus.CANCELLED})
+_NONE: frozenset[SessionStatus] = frozenset()
+
+# SessionStatus stays a str enum (values are persisted), so history is kept as
+# byte-sized ordinals into this tuple rather than as enum pairs.
+_STATES: tuple[SessionStatus, ...] = tuple(SessionStatus)
+_ORDINAL: Mapping[SessionStatus, int] = MappingProxyType({s: i for i, s in enumerate(_STATES)})
 
 
 class SessionFSM:
+    __slots__ = ("_state", "_session_id", "_path")
+
     def __init__(self, session_id: str) -> None:
         self._state = SessionStatus.IDLE
         self._session_id = session_id
-        self._history: list[tuple[SessionStatus, SessionStatus]] = []
+        # Every state visited, in order; transition i is (_path[i], _path[i + 1]).
+        self._path = array("B", (_ORDINAL[SessionStatus.IDLE],))
 
     @property
     def state(self) -> SessionStatus:
@@ -32,14 +53,13 @@ class SessionFSM:
 
     @property
     def is_terminal(self) -> bool:
-        return self._state in (SessionStatus.DONE, SessionStatus.FAILED, SessionStatus.CANCELLED)
+        return self._state in _TERMINAL
 
     def transition(self, to_state: SessionStatus) -> None:
-        allowed = _VALID.get(self._state, set())
-        if to_state not in allowed:
+        if to_state not in _VALID.get(self._state, _NONE):
             raise InvalidStateTransitionError(self._state.value, to_state.value)
-        self._history.append((self._state, to_state))
+        self._path.append(_ORDINAL[to_state])
         self._state = to_state
 
     def transition_history(self) -> list[tuple[SessionStatus, SessionStatus]]:
-        return list(self._history)
+        return [(_STATES[a], _STATES[b]) for a, b in pairwise(self._path)]
@@ -13,6 +13,7 @@ Invariants:
 
 from __future__ import annotations
 
+import hashlib
 import json
 import time
 import traceback
@@ -54,7 +55,6 @@ from aria.models.types import (
     StepType,
     ToolResult,
     new_id,
-    sha256_str,
     utcnow,
 )
 from aria.security.scrubber import assert_clean_input
@@ -63,6 +63,7 @@ from aria.tools.sandbox import run_tool_sandboxed
 
 _log = get_logger("aria.kernel")
 
+
 _SYSTEM_PROMPT = """\
 You are a task execution agent. Complete the given task using the available tools.
 
@@ -75,6 +76,33 @@ Rules:
 """
 
 
+class _PromptHasher:
+    """
+    sha256 of json.dumps([m.to_dict() for m in history]), fed one message at a time.
+
+    The conversation only grows, so each step hashes its new messages and finishes a copy
+    of the running digest instead of re-serialising the whole history. The bytes fed are
+    exactly json.dumps' list encoding, so the digest is unchanged.
+    """
+
+    __slots__ = ("_sha", "_count")
+
+    def __init__(self) -> None:
+        self._sha = hashlib.sha256(b"[")
+        self._count = 0
+
+    def digest(self, history: tuple[Message, ...]) -> str:
+        if len(history) < self._count:  # history replaced, not extended: start over
+            self._sha, self._count = hashlib.sha256(b"["), 0
+        for m in history[self._count :]:
+            sep = ", " if self._count else ""
+            self._sha.update((sep + json.dumps(m.to_dict())).encode())
+            self._count += 1
+        h = self._sha.copy()
+        h.update(b"]")
+        return h.hexdigest()
+
+
 class AgentKernel:
     """Single-agent, synchronous kernel. One instance per session. Not thread-safe."""
 
@@ -114,24 +142,26 @@ class AgentKernel:
             _log.warning("injection_scan_hit", extra={"session_id": session_id, "w": str(exc)})
             self._emit(session_id, None, "injection_scan_warn", LogLevel.WARN, {"w": str(exc)})
 
-        self._emit(
-            session_id,
-            None,
-            "session_start",
-            LogLevel.INFO,
-            {
-                "task_len": len(request.task),
-                "provider": request.provider_override or self._config.primary_provider,
-                "model": request.model_override or self._config.primary_model,
-            },
-        )
+        # Writes between external calls (model, tool) share one commit via batch()
+        with self._memory.batch():
+            self._emit(
+                session_id,
+                None,
+                "session_start",
+                LogLevel.INFO,
+                {
+                    "task_len": len(request.task),
+                    "provider": request.provider_override or self._config.primary_provider,
+                    "model": request.model_override or self._config.primary_model,
+                },
+            )
 
-        fsm.transition(SessionStatus.RUNNING)
-        self._sync_session(session_id, fsm, step_count, total_cost)
+            fsm.transition(SessionStatus.RUNNING)
+            self._sync_session(session_id, fsm, step_count, total_cost)
 
-        self._memory.append_message(
-            session_id, Message(role=MessageRole.USER, content=request.task)
-        )
+            self._memory.append_message(
+                session_id, Message(role=MessageRole.USER, content=request.task)
+            )
 
         ctx = ExecutionContext(
             session_id=session_id,
@@ -145,6 +175,7 @@ class AgentKernel:
         provider = request.provider_override or self._config.primary_provider
         model = request.model_override or self._config.primary_model
 
+        prompt_hasher = _PromptHasher()
         final_answer: str | None = None
         error_type: str | None = None
         error_msg: str | None = None
@@ -166,9 +197,7 @@ class AgentKernel:
                     )
 
                 # ── Model call ────────────────────────────────────────────────
-                prompt_hash = sha256_str(
-                    json.dumps([m.to_dict() for m in ctx.conversation_history])
-                )
+                prompt_hash = prompt_hasher.digest(ctx.conversation_history)
                 trace = StepTrace(
                     session_id=session_id,
                     step_number=step_count,
@@ -207,11 +236,13 @@ class AgentKernel:
                 if response.action == ActionType.FINAL_ANSWER:
                     trace.step_type = StepType.FINAL_ANSWER
                     trace.status = StepStatus.COMPLETED
-                    self._audit.write_step_end(trace)
                     final_answer = response.final_answer
-                    self._memory.append_message(
-                        session_id, Message(role=MessageRole.ASSISTANT, content=final_answer or "")
-                    )
+                    with self._memory.batch():
+                        self._audit.write_step_end(trace)
+                        self._memory.append_message(
+                            session_id,
+                            Message(role=MessageRole.ASSISTANT, content=final_answer or ""),
+                        )
                     fsm.transition(SessionStatus.DONE)
 
                 elif response.action == ActionType.TOOL_CALL:
@@ -232,19 +263,20 @@ class AgentKernel:
                     trace.tool_name = tc.tool_name
                     trace.tool_input_json = json.dumps(tc.arguments)
                     trace.status = StepStatus.COMPLETED
-                    self._audit.write_step_end(trace)
-
-                    self._memory.append_message(
-                        session_id,
-                        Message(
-                            role=MessageRole.ASSISTANT,
-                            content=f"[Tool call: {tc.tool_name}]",
-                            tool_call_id=tc.tool_call_id,
-                        ),
-                    )
+                    with self._memory.batch():
+                        self._audit.write_step_end(trace)
+
+                        self._memory.append_message(
+                            session_id,
+                            Message(
+                                role=MessageRole.ASSISTANT,
+                                content=f"[Tool call: {tc.tool_name}]",
+                                tool_call_id=tc.tool_call_id,
+                            ),
+                        )
 
-                    fsm.transition(SessionStatus.WAITING)
-                    self._sync_session(session_id, fsm, step_count, total_cost)
+                        fsm.transition(SessionStatus.WAITING)
+                        self._sync_session(session_id, fsm, step_count, total_cost)
 
                     tool_result = self._execute_tool(
                         session_id=session_id,
@@ -254,23 +286,24 @@ class AgentKernel:
                         tool_call_id=tc.tool_call_id,
                     )
 
-                    fsm.transition(SessionStatus.RUNNING)
-                    self._sync_session(session_id, fsm, step_count, total_cost)
-
                     tool_content = (
                         json.dumps(tool_result.data)
                         if tool_result.ok
                         else f"ERROR: {tool_result.error_message}"
                     )
-                    self._memory.append_message(
-                        session_id,
-                        Message(
-                            role=MessageRole.TOOL,
-                            content=tool_content,
-                            tool_name=tc.tool_name,
-                            tool_call_id=tc.tool_call_id,
-                        ),
-                    )
+                    with self._memory.batch():
+                        fsm.transition(SessionStatus.RUNNING)
+                        self._sync_session(session_id, fsm, step_count, total_cost)
+
+                        self._memory.append_message(
+                            session_id,
+                            Message(
+                                role=MessageRole.TOOL,
+                                content=tool_content,
+                                tool_name=tc.tool_name,
+                                tool_call_id=tc.tool_call_id,
+                            ),
+                        )
 
         except (StepLimitExceededError, CostBudgetExceededError, LimitError) as exc:
             error_type, error_msg = type(exc).__name__, str(exc)
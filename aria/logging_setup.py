@@ -2,14 +2,33 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import logging
+import re
 import sys
 from pathlib import Path
 from typing import Any
 
+from aria.security.scrubber import literal_alternation
 from aria.security.secrets import get_secrets_loader
 
+# json.dumps(..., default=str) builds a new encoder on every call; reuse one instead.
+_ENCODER = json.JSONEncoder(default=str)
+_MASK = "********"
+
+
+@functools.lru_cache(maxsize=8)
+def _secrets_pattern(secrets: frozenset) -> re.Pattern | None:
+    """Longest-match alternation of the secrets, applied in a single left-to-right pass.
+
+    Replacing secrets one at a time depended on set order: a short secret inside a longer
+    one could be masked first, leaving the rest of the longer secret in the output."""
+    literals = [s for s in secrets if s and len(s) > 4]
+    if not literals:
+        return None
+    return re.compile(literal_alternation(literals))
+
 
 class _JSONFormatter(logging.Formatter):
     """Formats every log record as a single JSON line. Scrubs secrets."""
@@ -75,15 +94,12 @@ class _JSONFormatter(logging.Formatter):
 
         # Scrub secrets
         try:
-            secrets = get_secrets_loader().known_values
-            # simple string replacement-based scrub to avoid recursion issues
-            json_str = json.dumps(data, default=str)
-            for secret in secrets:
-                if secret and len(secret) > 4:
-                    json_str = json_str.replace(secret, "********")
-            return json_str
+            pattern = _secrets_pattern(get_secrets_loader().known_values)
+            # scrub the serialised line rather than the dict to avoid recursion issues
+            json_str = _ENCODER.encode(data)
+            return json_str if pattern is None else pattern.sub(_MASK, json_str)
         except Exception:
-            return json.dumps(data, default=str)
+            return _ENCODER.encode(data)
 
 
 _configured = False
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import sqlite3
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from pathlib import Path
 from typing import Any
 
@@ -20,10 +23,6 @@ from aria.models.types import (
 )
 
 _SCHEMA = """
-PRAGMA journal_mode = WAL;
-PRAGMA synchronous = NORMAL;
-PRAGMA foreign_keys = ON;
-
 CREATE TABLE IF NOT EXISTS schema_version (
     version    INTEGER PRIMARY KEY,
     applied_at TEXT NOT NULL
@@ -90,6 +89,52 @@ CREATE INDEX IF NOT EXISTS idx_audit_session ON audit_events(session_id, timesta
 
 _SCHEMA_VERSION = 1
 
+# Hot-path statements live in constants so every call passes the identical string and
+# hits the connection's prepared-statement cache instead of re-parsing.
+_INSERT_SESSION = (
+    "INSERT INTO sessions (session_id,task,status,config_json,started_at) VALUES (?,?,?,?,?)"
+)
+
+_UPDATE_SESSION = (
+    "UPDATE sessions SET status=?,total_steps=?,total_cost_usd=?,"
+    "finished_at=?,error_type=?,error_msg=? WHERE session_id=?"
+)
+
+# Upsert keeps the original created_at without a separate SELECT round trip.
+_UPSERT_KV = (
+    "INSERT INTO kv_memory (key,namespace,value_json,created_at,updated_at,session_id) "
+    "VALUES (?,?,?,?,?,?) "
+    "ON CONFLICT(key,namespace) DO UPDATE SET value_json=excluded.value_json,"
+    "updated_at=excluded.updated_at,session_id=excluded.session_id"
+)
+
+_SELECT_KV = "SELECT value_json FROM kv_memory WHERE key=? AND namespace=?"
+
+_INSERT_STEP = (
+    "INSERT INTO steps (step_id,session_id,step_number,step_type,status,"
+    "prompt_hash,tool_name,tool_input_json,started_at,audit_chain_hash) "
+    "VALUES (?,?,?,?,?,?,?,?,?,?)"
+)
+
+_UPDATE_STEP = (
+    "UPDATE steps SET status=?,model_output_hash=?,tool_output_json=?,"
+    "input_tokens=?,output_tokens=?,cost_usd=?,duration_ms=?,"
+    "finished_at=?,audit_chain_hash=? WHERE step_id=?"
+)
+
+_INSERT_EVENT = (
+    "INSERT INTO audit_events "
+    "(event_id,session_id,step_id,event_type,level,"
+    "payload_json,chain_hash,timestamp) VALUES (?,?,?,?,?,?,?,?)"
+)
+
+# durability -> PRAGMA synchronous. "relaxed" skips fsync entirely (tests, scratch DBs);
+# WAL + NORMAL can lose the last commits on power loss but never corrupts the DB.
+_SYNCHRONOUS = {"normal": "NORMAL", "relaxed": "OFF"}
+
+# Comfortably above the number of distinct statements this module issues.
+_STATEMENT_CACHE_SIZE = 256
+
 
 # ── Interfaces ────────────────────────────────────────────────────────────────
 
@@ -118,6 +163,10 @@ class MemoryInterface(ABC):
     @abstractmethod
     def get_kv(self, key: str, namespace: str = "default") -> Any: ...
 
+    def batch(self) -> AbstractContextManager[None]:
+        """Group the writes made inside the block into one commit where supported."""
+        return nullcontext()
+
 
 class AuditInterface(ABC):
     @abstractmethod
@@ -131,24 +180,61 @@ class AuditInterface(ABC):
     @abstractmethod
     def verify_chain(self, session_id: str) -> bool: ...
 
+    def write_events(self, events: Iterable[AuditEvent]) -> None:
+        for event in events:
+            self.write_event(event)
+
 
 # ── SQLite implementation ─────────────────────────────────────────────────────
 
 
 class SQLiteStorage(MemoryInterface, AuditInterface):
-    def __init__(self, db_path: str) -> None:
-        resolved = Path(db_path).expanduser()
-        resolved.parent.mkdir(parents=True, exist_ok=True)
-        self._path = resolved
-        self._conn = sqlite3.connect(str(resolved), check_same_thread=True)
+    def __init__(self, db_path: str, durability: str = "normal", uri: bool = False) -> None:
+        if durability not in _SYNCHRONOUS:
+            raise ValueError(
+                f"durability must be one of {sorted(_SYNCHRONOUS)}, got {durability!r}"
+            )
+        in_memory = ":memory:" in db_path or "mode=memory" in db_path
+        if in_memory or uri:
+            target = db_path
+        else:
+            resolved = Path(db_path).expanduser()
+            resolved.parent.mkdir(parents=True, exist_ok=True)
+            target = str(resolved)
+        self._path = target
+        self._conn = sqlite3.connect(
+            target,
+            check_same_thread=True,
+            uri=uri,
+            cached_statements=_STATEMENT_CACHE_SIZE,
+            # No implicit BEGIN: a lone write autocommits (or joins an open batch()), and
+            # multi-statement units open their own transaction through batch().
+            isolation_level=None,
+        )
         self._conn.row_factory = sqlite3.Row
+        self._apply_pragmas(in_memory, durability)
         self._apply_schema()
-        self._run_integrity_check()
+        if not in_memory:  # a memory DB starts empty; there is no file to have been damaged
+            self._run_integrity_check()
         # Two separate chain sequences: audit_events and steps (never interleaved)
         self._chain_hashes: dict[str, str] = {}  # for audit_events
         self._step_chain_hashes: dict[str, str] = {}  # for steps table
+        # session_id -> (message dicts, Message objects). Appends don't re-read and re-parse
+        # the history, and reads hand out the already-built (frozen) Messages.
+        self._conversations: dict[str, tuple[list[dict], list[Message]]] = {}
         self._load_chain_hashes()
 
+    def _apply_pragmas(self, in_memory: bool, durability: str) -> None:
+        try:
+            if not in_memory:  # journaling and fsync policy only matter for a file
+                self._conn.execute("PRAGMA journal_mode = WAL")
+                self._conn.execute(f"PRAGMA synchronous = {_SYNCHRONOUS[durability]}")
+            self._conn.execute("PRAGMA temp_store = MEMORY")
+            self._conn.execute("PRAGMA cache_size = -64000")
+            self._conn.execute("PRAGMA foreign_keys = ON")
+        except sqlite3.Error as e:
+            raise MemoryCorruptionError(f"PRAGMA setup failed for {self._path}: {e}") from e
+
     def _apply_schema(self) -> None:
         try:
             self._conn.executescript(_SCHEMA)
@@ -184,6 +270,37 @@ class SQLiteStorage(MemoryInterface, AuditInterface):
         except sqlite3.Error:
             pass
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        One BEGIN IMMEDIATE ... COMMIT around the block. Nested calls join the outer
+        batch. On rollback the in-memory chain heads are restored with the rows.
+        """
+        if self._conn.in_transaction:
+            yield
+            return
+        saved = (dict(self._chain_hashes), dict(self._step_chain_hashes))
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            raise AuditWriteFailureError(f"BEGIN failed for {self._path}: {e}") from e
+        try:
+            yield
+        except BaseException:
+            self._rollback(saved)
+            raise
+        try:
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self._rollback(saved)
+            raise AuditWriteFailureError(f"COMMIT failed for {self._path}: {e}") from e
+
+    def _rollback(self, saved: tuple[dict[str, str], dict[str, str]]) -> None:
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
+        self._chain_hashes, self._step_chain_hashes = saved
+        self._conversations.clear()
+
     def _next_step_chain_hash(self, session_id: str, payload: str) -> str:
         prev = self._step_chain_hashes.get(session_id, "0" * 64)
         h = sha256_str(prev + sha256_str(payload))
@@ -201,12 +318,10 @@ class SQLiteStorage(MemoryInterface, AuditInterface):
 
     def create_session(self, session_id: str, task: str, config: KernelConfig) -> None:
         try:
-            with self._conn:
-                self._conn.execute(
-                    "INSERT INTO sessions (session_id,task,status,config_json,started_at) "
-                    "VALUES (?,?,?,?,?)",
-                    (session_id, task, SessionStatus.IDLE.value, config.to_json(), utcnow()),
-                )
+            self._conn.execute(
+                _INSERT_SESSION,
+                (session_id, task, SessionStatus.IDLE.value, config.to_json(), utcnow()),
+            )
         except sqlite3.Error as e:
             raise AuditWriteFailureError(f"create_session failed: {e}") from e
 
@@ -224,64 +339,57 @@ class SQLiteStorage(MemoryInterface, AuditInterface):
             if status in (SessionStatus.DONE, SessionStatus.FAILED, SessionStatus.CANCELLED)
             else None
         )
+        if finished is not None:
+            self._conversations.pop(session_id, None)
         try:
-            with self._conn:
-                self._conn.execute(
-                    "UPDATE sessions SET status=?,total_steps=?,total_cost_usd=?,"
-                    "finished_at=?,error_type=?,error_msg=? WHERE session_id=?",
-                    (
-                        status.value,
-                        total_steps,
-                        total_cost_usd,
-                        finished,
-                        error_type,
-                        error_msg,
-                        session_id,
-                    ),
-                )
+            self._conn.execute(
+                _UPDATE_SESSION,
+                (
+                    status.value,
+                    total_steps,
+                    total_cost_usd,
+                    finished,
+                    error_type,
+                    error_msg,
+                    session_id,
+                ),
+            )
         except sqlite3.Error as e:
             raise AuditWriteFailureError(f"update_session_status failed: {e}") from e
 
+    def _conversation(self, session_id: str) -> tuple[list[dict], list[Message]]:
+        cached = self._conversations.get(session_id)
+        if cached is None:
+            dicts = self.get_kv(f"conv_{session_id}", namespace="system") or []
+            cached = (dicts, [Message.from_dict(m) for m in dicts])
+            self._conversations[session_id] = cached
+        return cached
+
     def get_conversation_history(self, session_id: str) -> list[Message]:
-        data = self.get_kv(f"conv_{session_id}", namespace="system")
-        if data is None:
-            return []
-        return [Message.from_dict(m) for m in data]
+        return list(self._conversation(session_id)[1])
 
     def append_message(self, session_id: str, message: Message) -> None:
-        existing = self.get_conversation_history(session_id)
-        existing.append(message)
-        self.set_kv(
-            f"conv_{session_id}",
-            [m.to_dict() for m in existing],
-            namespace="system",
-            session_id=session_id,
-        )
+        dicts, messages = self._conversation(session_id)
+        dicts = [*dicts, message.to_dict()]
+        self.set_kv(f"conv_{session_id}", dicts, namespace="system", session_id=session_id)
+        self._conversations[session_id] = (dicts, [*messages, message])
 
     def set_kv(
         self, key: str, value: Any, namespace: str = "default", session_id: str | None = None
     ) -> None:
+        if namespace == "system" and key.startswith("conv_"):
+            self._conversations.pop(key[5:], None)
         now = utcnow()
         try:
-            with self._conn:
-                row = self._conn.execute(
-                    "SELECT created_at FROM kv_memory WHERE key=? AND namespace=?", (key, namespace)
-                ).fetchone()
-                created = row["created_at"] if row else now
-                self._conn.execute(
-                    "INSERT OR REPLACE INTO kv_memory "
-                    "(key,namespace,value_json,created_at,updated_at,session_id) "
-                    "VALUES (?,?,?,?,?,?)",
-                    (key, namespace, json.dumps(value), created, now, session_id),
-                )
+            self._conn.execute(
+                _UPSERT_KV, (key, namespace, json.dumps(value), now, now, session_id)
+            )
         except sqlite3.Error as e:
             raise AuditWriteFailureError(f"set_kv failed: {e}") from e
 
     def get_kv(self, key: str, namespace: str = "default") -> Any:
         try:
-            row = self._conn.execute(
-                "SELECT value_json FROM kv_memory WHERE key=? AND namespace=?", (key, namespace)
-            ).fetchone()
+            row = self._conn.execute(_SELECT_KV, (key, namespace)).fetchone()
             return json.loads(row["value_json"]) if row else None
         except sqlite3.Error as e:
             raise MemoryCorruptionError(f"get_kv failed: {e}") from e
@@ -292,24 +400,21 @@ class SQLiteStorage(MemoryInterface, AuditInterface):
         payload = json.dumps({"step_id": trace.step_id, "status": "started"})
         chain = self._next_step_chain_hash(trace.session_id, payload)
         try:
-            with self._conn:
-                self._conn.execute(
-                    "INSERT INTO steps (step_id,session_id,step_number,step_type,status,"
-                    "prompt_hash,tool_name,tool_input_json,started_at,audit_chain_hash) "
-                    "VALUES (?,?,?,?,?,?,?,?,?,?)",
-                    (
-                        trace.step_id,
-                        trace.session_id,
-                        trace.step_number,
-                        trace.step_type.value,
-                        trace.status.value,
-                        trace.prompt_hash,
-                        trace.tool_name,
-                        trace.tool_input_json,
-                        trace.started_at,
-                        chain,
-                    ),
-                )
+            self._conn.execute(
+                _INSERT_STEP,
+                (
+                    trace.step_id,
+                    trace.session_id,
+                    trace.step_number,
+                    trace.step_type.value,
+                    trace.status.value,
+                    trace.prompt_hash,
+                    trace.tool_name,
+                    trace.tool_input_json,
+                    trace.started_at,
+                    chain,
+                ),
+            )
         except sqlite3.Error as e:
             raise AuditWriteFailureError(f"write_step_start failed: {e}") from e
 
@@ -323,50 +428,59 @@ class SQLiteStorage(MemoryInterface, AuditInterface):
         )
         chain = self._next_chain_hash(trace.session_id, payload, namespace="step")
         try:
-            with self._conn:
-                self._conn.execute(
-                    "UPDATE steps SET status=?,model_output_hash=?,tool_output_json=?,"
-                    "input_tokens=?,output_tokens=?,cost_usd=?,duration_ms=?,"
-                    "finished_at=?,audit_chain_hash=? WHERE step_id=?",
-                    (
-                        trace.status.value,
-                        trace.model_output_hash,
-                        trace.tool_output_json,
-                        trace.input_tokens,
-                        trace.output_tokens,
-                        trace.cost_usd,
-                        trace.duration_ms,
-                        trace.finished_at,
-                        chain,
-                        trace.step_id,
-                    ),
-                )
+            self._conn.execute(
+                _UPDATE_STEP,
+                (
+                    trace.status.value,
+                    trace.model_output_hash,
+                    trace.tool_output_json,
+                    trace.input_tokens,
+                    trace.output_tokens,
+                    trace.cost_usd,
+                    trace.duration_ms,
+                    trace.finished_at,
+                    chain,
+                    trace.step_id,
+                ),
+            )
         except sqlite3.Error as e:
             raise AuditWriteFailureError(f"write_step_end failed: {e}") from e
 
-    def write_event(self, event: AuditEvent) -> None:
+    def _event_row(self, event: AuditEvent) -> tuple:
         payload_json = json.dumps(event.payload)
         chain = self._next_chain_hash(event.session_id, payload_json)
+        return (
+            event.event_id,
+            event.session_id,
+            event.step_id,
+            event.event_type,
+            event.level.value,
+            payload_json,
+            chain,
+            event.timestamp,
+        )
+
+    def write_event(self, event: AuditEvent) -> None:
+        row = self._event_row(event)
         try:
-            with self._conn:
-                self._conn.execute(
-                    "INSERT INTO audit_events "
-                    "(event_id,session_id,step_id,event_type,level,"
-                    "payload_json,chain_hash,timestamp) VALUES (?,?,?,?,?,?,?,?)",
-                    (
-                        event.event_id,
-                        event.session_id,
-                        event.step_id,
-                        event.event_type,
-                        event.level.value,
-                        payload_json,
-                        chain,
-                        event.timestamp,
-                    ),
-                )
+            self._conn.execute(_INSERT_EVENT, row)
         except sqlite3.Error as e:
             raise AuditWriteFailureError(f"write_event failed: {e}") from e
 
+    def write_events(self, events: Iterable[AuditEvent]) -> None:
+        """Insert events in one transaction. All-or-nothing, chain state included."""
+        saved = dict(self._chain_hashes)
+        try:
+            with self.batch():
+                rows = [self._event_row(e) for e in events]
+                self._conn.executemany(_INSERT_EVENT, rows)
+        except sqlite3.Error as e:
+            self._chain_hashes = saved
+            raise AuditWriteFailureError(f"write_events failed: {e}") from e
+        except BaseException:  # e.g. an unserialisable payload, or COMMIT failing
+            self._chain_hashes = saved
+            raise
+
     def get_session_events(self, session_id: str) -> list[dict]:
         try:
             rows = self._conn.execute(
@@ -389,20 +503,25 @@ class SQLiteStorage(MemoryInterface, AuditInterface):
             raise MemoryCorruptionError(f"list_sessions failed: {e}") from e
 
     def verify_chain(self, session_id: str) -> bool:
+        # One linear pass: each row's hash depends only on the previous row's stored hash.
+        # Rows are streamed as plain tuples rather than fetched into sqlite3.Row objects.
         try:
-            rows = self._conn.execute(
+            cur = self._conn.cursor()
+            cur.row_factory = None
+            cur.execute(
                 "SELECT payload_json,chain_hash FROM audit_events "
                 "WHERE session_id=? ORDER BY timestamp",
                 (session_id,),
-            ).fetchall()
-            if not rows:
-                return True
+            )
+            # sha256_str inlined with a local binding: the hashing dominates, and the per-row
+            # function frames were most of what remained in a long session's loop.
+            sha256 = hashlib.sha256
             prev = "0" * 64
-            for r in rows:
-                expected = sha256_str(prev + sha256_str(r["payload_json"]))
-                if expected != r["chain_hash"]:
+            for payload_json, chain_hash in cur:
+                digest = sha256(payload_json.encode()).hexdigest()
+                if sha256((prev + digest).encode()).hexdigest() != chain_hash:
                     return False
-                prev = r["chain_hash"]
+                prev = chain_hash
             # Audit chain is intact
             return True
         except sqlite3.Error:
@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import time
+from collections import deque
+from collections.abc import Callable
 from enum import Enum
 
 from aria.models.errors import CircuitBreakerOpenError
@@ -21,19 +23,21 @@ class CircuitBreaker:
         failure_threshold: int = 3,
         window_seconds: float = 60.0,
         recovery_seconds: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
     ) -> None:
         self.provider = provider
         self._threshold = failure_threshold
         self._window = window_seconds
         self._recovery = recovery_seconds
+        self._clock = clock
         self._state = CBState.CLOSED
-        self._failures: list[float] = []
+        self._failures: deque[float] = deque()  # oldest first
         self._opened_at: float | None = None
 
     @property
     def state(self) -> CBState:
         if self._state == CBState.OPEN and self._opened_at is not None:
-            if time.monotonic() - self._opened_at >= self._recovery:
+            if self._clock() - self._opened_at >= self._recovery:
                 self._state = CBState.HALF_OPEN
         return self._state
 
@@ -48,17 +52,19 @@ class CircuitBreaker:
             self._opened_at = None
 
     def record_failure(self) -> None:
-        now = time.monotonic()
+        now = self._clock()
         if self._state == CBState.HALF_OPEN:
             self._opened_at = now
             self._state = CBState.OPEN
             return
-        self._failures = [t for t in self._failures if now - t < self._window]
-        self._failures.append(now)
-        if len(self._failures) >= self._threshold:
+        failures = self._failures
+        while failures and now - failures[0] >= self._window:
+            failures.popleft()
+        failures.append(now)
+        if len(failures) >= self._threshold:
             self._opened_at = now
             self._state = CBState.OPEN
-            self._failures.clear()
+            failures.clear()
 
     def reset(self) -> None:
         self._state = CBState.CLOSED
@@ -8,6 +8,8 @@ from __future__ import annotations
 
 import hashlib
 import json
+import os
+import re
 import uuid
 from dataclasses import dataclass, field
 from datetime import UTC
@@ -112,6 +114,23 @@ def _validate_int(value: Any, field: str, ge: int = 0, le: int = 2**31) -> int:
     return value
 
 
+def _schema_is_trivial(schema: dict) -> bool:
+    """True if the schema accepts any object: no properties, required keys or restrictions."""
+    if schema.get("type", "object") != "object":
+        return False
+    return (
+        not schema.get("properties")
+        and not schema.get("required")
+        and schema.get("additionalProperties", True) is not False
+    )
+
+
+_TOOL_NAME_RE = re.compile(r"[a-z][a-z0-9_]{1,63}")
+_SEMVER_RE = re.compile(r"\d+\.\d+\.\d+")
+# One shared frozenset per distinct permission set (at most 2**len(ToolPermission))
+_PERMISSION_SETS: dict[frozenset, frozenset] = {}
+
+
 # ── Core data structures ──────────────────────────────────────────────────────
 
 
@@ -126,13 +145,20 @@ class ToolManifest:
     output_schema: dict
     max_memory_mb: int = 256
     allowed_paths: tuple = ()
+    # Derived in __post_init__ — lets the sandbox skip validating accept-all schemas
+    _input_trivial: bool = field(default=False, init=False, repr=False, compare=False)
+    _output_trivial: bool = field(default=False, init=False, repr=False, compare=False)
+    # allowed_paths resolved once; validate_paths compares against these
+    _canonical_allowed: tuple = field(default=(), init=False, repr=False, compare=False)
+    # ...and the "<base>/" prefixes a path strictly inside one of them starts with
+    _allowed_prefixes: tuple = field(default=(), init=False, repr=False, compare=False)
+    # Schemas are dicts (unhashable); hash on the identifying fields, computed once
+    _hash: int = field(default=0, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
-        import re
-
-        if not re.match(r"^[a-z][a-z0-9_]{1,63}$", self.name):
+        if not _TOOL_NAME_RE.fullmatch(self.name):
             raise ValueError(f"Tool name {self.name!r} invalid (must match [a-z][a-z0-9_]{{1,63}})")
-        if not re.match(r"^\d+\.\d+\.\d+$", self.version):
+        if not _SEMVER_RE.fullmatch(self.version):
             raise ValueError(f"Version {self.version!r} invalid (must be semver like 1.0.0)")
         if len(self.description) < 10:
             raise ValueError("description must be at least 10 characters")
@@ -141,10 +167,26 @@ class ToolManifest:
         if self.max_memory_mb < 32 or self.max_memory_mb > 2048:
             raise ValueError("max_memory_mb must be 32-2048")
         for p in self.allowed_paths:
-            from pathlib import Path
-
-            if not Path(p).is_absolute():
+            if not os.path.isabs(p):
                 raise ValueError(f"allowed_paths must be absolute, got: {p!r}")
+        object.__setattr__(self, "_input_trivial", _schema_is_trivial(self.input_schema))
+        object.__setattr__(self, "_output_trivial", _schema_is_trivial(self.output_schema))
+        canonical = tuple(os.path.realpath(p) for p in self.allowed_paths)
+        object.__setattr__(self, "_canonical_allowed", canonical)
+        object.__setattr__(
+            self,
+            "_allowed_prefixes",
+            tuple(b if b.endswith(os.sep) else b + os.sep for b in canonical),  # "/" stays "/"
+        )
+        permissions = frozenset(self.permissions)
+        permissions = _PERMISSION_SETS.setdefault(permissions, permissions)
+        object.__setattr__(self, "permissions", permissions)
+        object.__setattr__(
+            self, "_hash", hash((self.name, self.version, self.allowed_paths, permissions))
+        )
+
+    def __hash__(self) -> int:
+        return self._hash
 
     def to_dict(self) -> dict:
         return {
@@ -179,7 +221,7 @@ class KernelConfig:
     plugin_dirs: tuple = ()
     log_level: str = "INFO"
     db_path: str = "~/.aria/aria.db"
-    log_path: str = "~/.aria/logs/aria.jsonl"
+    log_path: str | None = "~/.aria/logs/aria.jsonl"  # None: no JSONL file sink
 
     def to_json(self) -> str:
         return json.dumps(
@@ -221,7 +263,7 @@ class SessionResult:
     error_message: str | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Message:
     role: MessageRole
     content: str
@@ -253,7 +295,7 @@ class ToolCallRequest:
     tool_call_id: str = field(default_factory=new_id)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RawModelResponse:
     action: ActionType
     input_tokens: int
@@ -303,7 +345,7 @@ class StepTrace:
     audit_chain_hash: str = ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AuditEvent:
     session_id: str
     event_type: str
@@ -315,7 +357,7 @@ class AuditEvent:
     timestamp: str = field(default_factory=utcnow)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PromptRequest:
     messages: tuple
     system_prompt: str
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import functools
 import re
+from collections.abc import Iterable
 from typing import Any
 
 from aria.models.errors import PromptInjectionWarning
@@ -19,67 +21,159 @@ _SECRET_KEYS = {
     "private_key",
     "access_key",
 }
+
+# Possessive quantifiers (*+, ++, {n,}+) never give characters back, so a failed attempt
+# does not retry every shorter run — the same for the injection patterns below.
 _SECRET_RE = re.compile(
-    r"(sk-[a-zA-Z0-9\-_]{20,}|sk-ant-[a-zA-Z0-9\-_]{20,}|"
-    r"Bearer [a-zA-Z0-9\-_.]{20,}|[A-Za-z0-9+/]{40,}={0,2})"
+    r"(sk-[a-zA-Z0-9\-_]{20,}+|sk-ant-[a-zA-Z0-9\-_]{20,}+|"
+    r"Bearer [a-zA-Z0-9\-_.]{20,}+|[A-Za-z0-9+/]{40,}+={0,2}+)"
 )
 _REDACTED = "[REDACTED]"
 
 
-def scrub_value(value: Any, known: frozenset) -> Any:
+def literal_alternation(literals: Iterable[str]) -> str:
+    """
+    Regex source matching any of ``literals``, preferring the longest at each position.
+
+    Built as a prefix trie (``abcd(?:\\-secret)?|hunter22``) rather than a flat ``a|b|c``
+    list, so each position is tested against the next character once instead of against
+    every literal in turn — the difference shows with hundreds of known secrets.
+    """
+    trie: dict = {}
+    for literal in literals:
+        node = trie
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # a literal ends here
+
+    def emit(node: dict) -> str:
+        branches = []
+        for ch in sorted(k for k in node if k):
+            run, child = ch, node[ch]
+            while len(child) == 1 and "" not in child:  # fold single-child chains
+                ((nxt, child),) = child.items()
+                run += nxt
+            branches.append(re.escape(run) + emit(child))
+        if not branches:
+            return ""
+        body = "(?:" + "|".join(branches) + ")" if len(branches) > 1 else branches[0]
+        # Ending here is the fallback: the greedy ? tries the longer continuations first
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+# A key containing any of _SECRET_KEYS (case-insensitive) has its whole value redacted
+_SECRET_KEY_RE = re.compile(literal_alternation(_SECRET_KEYS))
+
+
+@functools.lru_cache(maxsize=32)
+def _scrub_pattern(known: frozenset) -> re.Pattern | None:
+    """One alternation over the known secrets (longest match wins, so one containing another
+    is redacted whole), or None if there are none. Applied before _SECRET_RE: a generic match
+    may start ahead of a known secret and end inside it, leaving the rest of it in the log."""
+    literals = [s for s in known if isinstance(s, str) and s]
+    return re.compile(literal_alternation(literals)) if literals else None
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_secret_key(key: str) -> bool:
+    """True if the lowercased key contains any of _SECRET_KEYS. Log field names repeat, so
+    each distinct key is searched once."""
+    return _SECRET_KEY_RE.search(key.lower()) is not None
+
+
+def _scrub(value: Any, pattern: re.Pattern | None) -> Any:
     if isinstance(value, str):
-        for s in known:
-            if s and s in value:
-                value = value.replace(s, _REDACTED)
+        if pattern is not None:
+            value = pattern.sub(_REDACTED, value)
         return _SECRET_RE.sub(_REDACTED, value)
     if isinstance(value, dict):
-        return {
-            k: _REDACTED if any(p in k.lower() for p in _SECRET_KEYS) else scrub_value(v, known)
-            for k, v in value.items()
-        }
+        return {k: _REDACTED if _is_secret_key(k) else _scrub(v, pattern) for k, v in value.items()}
     if isinstance(value, (list, tuple)):
-        return [scrub_value(i, known) for i in value]
+        return [_scrub(i, pattern) for i in value]
     return value
 
 
+# The pattern for a secret set is resolved once per call and threaded through the
+# recursion, rather than looked up again for every nested string.
+def scrub_value(value: Any, known: frozenset) -> Any:
+    return _scrub(value, _scrub_pattern(known))
+
+
 def scrub_record(record: dict, known: frozenset) -> dict:
-    return {
-        k: _REDACTED if any(p in k.lower() for p in _SECRET_KEYS) else scrub_value(v, known)
-        for k, v in record.items()
-    }
-
-
-_INJECTION_PATTERNS: list[re.Pattern] = [
-    re.compile(r"\bignore\s+(previous|above|all|prior)\s+(instructions?|prompts?|rules?)\b", re.I),
-    re.compile(r"\byou\s+are\s+now\b", re.I),
-    re.compile(r"\bsystem\s*:\s*", re.I),
-    re.compile(r"\bdisregard\s+(your|all|the)\b", re.I),
-    re.compile(r"\bforget\s+(your|all|previous)\b", re.I),
-    re.compile(r"\bnew\s+instructions?\b", re.I),
-    re.compile(r"\bjailbreak\b", re.I),
-    re.compile(r"\bDAN\b"),
-    re.compile(r"\[INST\]|\[/INST\]"),
+    return _scrub(record, _scrub_pattern(known))
+
+
+# (reported source, compiled pattern). Callers see the reported text in matched_patterns
+# and PromptInjectionWarning, so it stays the original spelling; the compiled forms are
+# possessive, which matches the same texts without backtracking.
+_INJECTION_PATTERNS: list[tuple[str, re.Pattern]] = [
+    (
+        r"\bignore\s+(previous|above|all|prior)\s+(instructions?|prompts?|rules?)\b",
+        re.compile(
+            r"\bignore\s++(previous|above|all|prior)\s++(instructions?|prompts?|rules?)\b", re.I
+        ),
+    ),
+    (r"\byou\s+are\s+now\b", re.compile(r"\byou\s++are\s++now\b", re.I)),
+    (r"\bsystem\s*:\s*", re.compile(r"\bsystem\s*+:", re.I)),
+    (r"\bdisregard\s+(your|all|the)\b", re.compile(r"\bdisregard\s++(your|all|the)\b", re.I)),
+    (r"\bforget\s+(your|all|previous)\b", re.compile(r"\bforget\s++(your|all|previous)\b", re.I)),
+    (r"\bnew\s+instructions?\b", re.compile(r"\bnew\s++instructions?\b", re.I)),
+    (r"\bjailbreak\b", re.compile(r"\bjailbreak\b", re.I)),
+    (r"\bDAN\b", re.compile(r"\bDAN\b")),
+    (r"\[INST\]|\[/INST\]", re.compile(r"\[INST\]|\[/INST\]")),
 ]
 
+# All patterns in one alternation (flags scoped per branch) so clean text — the common
+# case — costs one regex scan. Per-pattern searches run only once this has matched.
+_INJECTION_ANY = re.compile(
+    "|".join(f"(?{'i' if p.flags & re.I else '-i'}:{p.pattern})" for _, p in _INJECTION_PATTERNS)
+)
+
 
 class InjectionScanResult:
     __slots__ = ("clean", "matched_patterns")
 
-    def __init__(self, clean: bool, matched_patterns: list) -> None:
+    def __init__(self, clean: bool, matched_patterns: tuple[str, ...]) -> None:
         self.clean = clean
         self.matched_patterns = matched_patterns
 
 
+_CLEAN = InjectionScanResult(clean=True, matched_patterns=())
+
+
+# Texts up to a session task's maximum length are memoized; longer ones are scanned in full
+# every time rather than pinned in the cache. Results are shared between callers, hence
+# the tuple of patterns.
+_CACHEABLE_LEN = 4096
+
+
 def scan_for_injection(text: str) -> InjectionScanResult:
-    matched = [p.pattern for p in _INJECTION_PATTERNS if p.search(text)]
+    if len(text) <= _CACHEABLE_LEN:
+        return _scan_cached(text)
+    return _scan(text)
+
+
+def _scan(text: str) -> InjectionScanResult:
+    first = _INJECTION_ANY.search(text)
+    if first is None:
+        return _CLEAN
+    # No pattern matches before the first combined hit, so the per-pattern searches start
+    # there (pos keeps \b looking at the preceding character, unlike slicing).
+    start = first.start()
+    matched = tuple(src for src, p in _INJECTION_PATTERNS if p.search(text, start))
     return InjectionScanResult(clean=len(matched) == 0, matched_patterns=matched)
 
 
+_scan_cached = functools.lru_cache(maxsize=1024)(_scan)
+
+
 def assert_clean_input(text: str, field_name: str = "input") -> None:
     r = scan_for_injection(text)
     if not r.clean:
         raise PromptInjectionWarning(
-            f"Potential prompt injection in {field_name!r}. Patterns: {r.matched_patterns}"
+            f"Potential prompt injection in {field_name!r}. Patterns: {list(r.matched_patterns)}"
         )
 
 
@@ -88,6 +182,11 @@ class SecretsScrubberProcessor:
 
     def __init__(self, known_secrets_getter) -> None:
         self._get = known_secrets_getter
+        self._known: frozenset | None = None
+        self._pattern: re.Pattern | None = None
 
     def __call__(self, logger, method, event_dict: dict) -> dict:
-        return scrub_record(event_dict, self._get())
+        known = self._get()
+        if known is not self._known:  # SecretsLoader returns one set until a secret loads
+            self._known, self._pattern = known, _scrub_pattern(known)
+        return _scrub(event_dict, self._pattern)
@@ -10,6 +10,8 @@ from aria.models.errors import SecretInvalidError, SecretNotFoundError
 class SecretsLoader:
     def __init__(self) -> None:
         self._loaded: dict[str, str] = {}
+        # Rebuilt only when a secret is loaded; log formatting reads this per record
+        self._known: frozenset | None = None
 
     def require(self, env_key: str, min_length: int = 8) -> str:
         if env_key in self._loaded:
@@ -25,6 +27,7 @@ class SecretsLoader:
                 f"Env var {env_key!r} appears invalid (length {len(value)} < {min_length})"
             )
         self._loaded[env_key] = value
+        self._known = None
         return value
 
     def optional(self, env_key: str, default: str = "") -> str:
@@ -33,11 +36,14 @@ class SecretsLoader:
         value = os.environ.get(env_key, default).strip()
         if value:
             self._loaded[env_key] = value
+            self._known = None
         return value
 
     @property
     def known_values(self) -> frozenset:
-        return frozenset(v for v in self._loaded.values() if len(v) >= 4)
+        if self._known is None:
+            self._known = frozenset(v for v in self._loaded.values() if len(v) >= 4)
+        return self._known
 
 
 _loader: SecretsLoader | None = None
@@ -2,25 +2,35 @@
 
 from __future__ import annotations
 
+import functools
 import importlib.util
+import inspect
+import re
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 from aria.logging_setup import get_logger
 from aria.models.errors import ManifestValidationError, PermissionDeniedError, UnknownToolError
 from aria.models.types import KernelConfig, ToolManifest
+from aria.tools.sandbox import precompile_schema
 
 _log = get_logger("aria.registry")
 
 
+@dataclass(slots=True)
+class _ToolEntry:
+    manifest: ToolManifest
+    executor: Any
+    module_path: str
+
+
 class ToolRegistry:
     """Immutable after build(). All validation happens in build()."""
 
     def __init__(self, config: KernelConfig) -> None:
         self._config = config
-        self._manifests: dict[str, ToolManifest] = {}
-        self._executors: dict[str, Any] = {}
-        self._module_paths: dict[str, str] = {}
+        self._tools: dict[str, _ToolEntry] = {}
 
     def build(self, extra_plugin_dirs: list | None = None) -> None:
         from aria.tools.builtin import BUILTIN_TOOLS
@@ -34,7 +44,7 @@ class ToolRegistry:
             if not d.is_dir():
                 raise ManifestValidationError(f"plugin_dir {d!r} does not exist")
             self._load_dir(d)
-        _log.info("registry built", extra={"tools": list(self._manifests)})
+        _log.info("registry built", extra={"tools": list(self._tools)})
 
     def _load_dir(self, plugin_dir: Path) -> None:
         for py_file in sorted(plugin_dir.glob("*.py")):
@@ -65,39 +75,42 @@ class ToolRegistry:
                 f"Tool {manifest.name!r} requires {disallowed} "
                 f"not in allowed_permissions: {self._config.allowed_permissions}"
             )
-        if manifest.name in self._manifests:
+        if manifest.name in self._tools:
             raise ManifestValidationError(f"Duplicate tool name: {manifest.name!r}")
-        self._manifests[manifest.name] = manifest
-        self._executors[manifest.name] = cls
-        self._module_paths[manifest.name] = module_path
+        try:
+            precompile_schema(manifest.input_schema)
+            precompile_schema(manifest.output_schema)
+        except re.error as e:
+            raise ManifestValidationError(f"Tool {manifest.name!r} has invalid pattern: {e}") from e
+        self._tools[manifest.name] = _ToolEntry(manifest, cls, module_path)
         _log.info("tool registered", extra={"tool_name": manifest.name})
 
     def get_manifest(self, name: str) -> ToolManifest:
-        if name not in self._manifests:
-            raise UnknownToolError(
-                f"Tool {name!r} not registered. Available: {list(self._manifests)}"
-            )
-        return self._manifests[name]
+        entry = self._tools.get(name)
+        if entry is None:
+            raise UnknownToolError(f"Tool {name!r} not registered. Available: {list(self._tools)}")
+        return entry.manifest
 
     def get_executor(self, name: str) -> Any:
-        if name not in self._executors:
+        entry = self._tools.get(name)
+        if entry is None:
             raise UnknownToolError(f"Tool executor {name!r} not found")
-        return self._executors[name]
+        return entry.executor
 
     def get_module_path(self, name: str) -> str:
-        return self._module_paths.get(name, "")
+        entry = self._tools.get(name)
+        return entry.module_path if entry is not None else ""
 
     @property
     def all_manifests(self) -> tuple:
-        return tuple(self._manifests.values())
+        return tuple(e.manifest for e in self._tools.values())
 
     def has_tool(self, name: str) -> bool:
-        return name in self._manifests
+        return name in self._tools
 
 
+@functools.cache
 def _module_path(cls: Any) -> str:
-    import inspect
-
     try:
         return inspect.getfile(cls)
     except (TypeError, OSError):
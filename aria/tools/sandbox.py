@@ -5,17 +5,27 @@ Security invariants:
   - shell=False ALWAYS. Args are list[str], never concatenated strings.
   - Paths validated before subprocess spawns.
   - Memory limited via resource in child.
-  - SIGKILL on timeout.
+  - SIGALRM in child on timeout; SIGKILL from parent as a backstop.
+  - Persistent worker processes fork a fresh child per call (no state shared between
+    calls), run in the caller's current cwd and environment; concurrent calls each use
+    their own worker. Platforms without fork start a new interpreter per call.
+  - Each forked child leads its own process group, killed when the call ends, so
+    processes a tool starts cannot outlive it.
 """
 
 from __future__ import annotations
 
+import atexit
+import functools
 import json
 import os
-import subprocess
+import re
+import select
+import signal
 import sys
+import threading
 import time
-from pathlib import Path
+from collections.abc import Callable
 from typing import Any
 
 from aria.logging_setup import get_logger
@@ -29,139 +39,550 @@ from aria.models.errors import (
 from aria.models.types import ToolManifest, ToolResult
 
 _log = get_logger("aria.sandbox")
+_DECODER = json.JSONDecoder()
 
 
 # Minimal JSON schema validator using stdlib only
-def _validate_schema(data: Any, schema: dict, path: str = "", **kwargs: Any) -> list[str]:
-    """Returns list of error strings. Empty list = valid."""
-    errors: list[str] = []
-    t = schema.get("type")
-    if t == "object":
+@functools.lru_cache(maxsize=512)
+def _pattern(regex: str) -> re.Pattern:
+    return re.compile(regex)
+
+
+def precompile_schema(schema: dict) -> None:
+    """Compile every "pattern" in schema into the shared cache. Raises re.error if invalid."""
+    if "pattern" in schema:
+        _pattern(schema["pattern"])
+    for sub_schema in schema.get("properties", {}).values():
+        precompile_schema(sub_schema)
+
+
+# A schema compiles to a tree of closures: keyword lookups and sub-schema dispatch happen
+# once, and a call only runs the checks the schema actually has.
+_Check = Callable[[Any, list[str]], None]
+
+
+def _no_check(data: Any, errors: list[str]) -> None:
+    return None
+
+
+def _compile_object(schema: dict, path: str) -> _Check:
+    props = schema.get("properties", {})
+    required = schema.get("required", [])
+    closed = schema.get("additionalProperties", True) is False
+    children = [(k, _compile(sub_schema, f"{path}.{k}")) for k, sub_schema in props.items()]
+
+    def check(data: Any, errors: list[str]) -> None:
         if not isinstance(data, dict):
             errors.append(f"{path}: expected object, got {type(data).__name__}")
-            return errors
-        props = schema.get("properties", {})
-        required = schema.get("required", [])
-        additional = schema.get("additionalProperties", True)
+            return
         for k in required:
             if k not in data:
                 errors.append(f"{path}.{k}: required field missing")
-        if additional is False:
+        if closed:
             for k in data:
                 if k not in props:
                     errors.append(f"{path}.{k}: additional property not allowed")
-        for k, sub_schema in props.items():
+        for k, child in children:
             if k in data:
-                errors.extend(_validate_schema(data[k], sub_schema, f"{path}.{k}"))
-    elif t == "string":
+                child(data[k], errors)
+
+    return check
+
+
+def _compile_string(schema: dict, path: str) -> _Check:
+    min_l = schema.get("minLength", 0)
+    max_l = schema.get("maxLength", float("inf"))
+    enum = schema.get("enum")
+    regex = schema.get("pattern")
+    compiled = _pattern(regex) if regex is not None else None
+
+    def check(data: Any, errors: list[str]) -> None:
         if not isinstance(data, str):
             errors.append(f"{path}: expected string, got {type(data).__name__}")
-        else:
-            min_l = schema.get("minLength", 0)
-            max_l = schema.get("maxLength", float("inf"))
-            if len(data) < min_l:
-                errors.append(f"{path}: string too short (min {min_l})")
-            if len(data) > max_l:
-                errors.append(f"{path}: string too long (max {max_l})")
-            enum = schema.get("enum")
-            if enum and data not in enum:
-                errors.append(f"{path}: value {data!r} not in enum {enum}")
-    elif t == "integer":
+            return
+        if len(data) < min_l:
+            errors.append(f"{path}: string too short (min {min_l})")
+        if len(data) > max_l:
+            errors.append(f"{path}: string too long (max {max_l})")
+        if enum and data not in enum:
+            errors.append(f"{path}: value {data!r} not in enum {enum}")
+        if compiled is not None and not compiled.search(data):
+            errors.append(f"{path}: value {data!r} does not match pattern {regex!r}")
+
+    return check
+
+
+def _compile_integer(schema: dict, path: str) -> _Check:
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+
+    def check(data: Any, errors: list[str]) -> None:
         if not isinstance(data, int) or isinstance(data, bool):
             errors.append(f"{path}: expected integer, got {type(data).__name__}")
-        else:
-            if "minimum" in schema and data < schema["minimum"]:
-                errors.append(f"{path}: {data} < minimum {schema['minimum']}")
-            if "maximum" in schema and data > schema["maximum"]:
-                errors.append(f"{path}: {data} > maximum {schema['maximum']}")
-    elif t == "boolean":
+            return
+        if minimum is not None and data < minimum:
+            errors.append(f"{path}: {data} < minimum {minimum}")
+        if maximum is not None and data > maximum:
+            errors.append(f"{path}: {data} > maximum {maximum}")
+
+    return check
+
+
+def _compile_boolean(schema: dict, path: str) -> _Check:
+    def check(data: Any, errors: list[str]) -> None:
         if not isinstance(data, bool):
             errors.append(f"{path}: expected boolean, got {type(data).__name__}")
-    elif t == "array":
+
+    return check
+
+
+def _compile_array(schema: dict, path: str) -> _Check:
+    def check(data: Any, errors: list[str]) -> None:
         if not isinstance(data, list):
             errors.append(f"{path}: expected array, got {type(data).__name__}")
+
+    return check
+
+
+_COMPILERS: dict[str, Callable[[dict, str], _Check]] = {
+    "object": _compile_object,
+    "string": _compile_string,
+    "integer": _compile_integer,
+    "boolean": _compile_boolean,
+    "array": _compile_array,
+}
+
+
+def _compile(schema: dict, path: str) -> _Check:
+    compiler = _COMPILERS.get(schema.get("type"))  # type: ignore[arg-type]
+    return compiler(schema, path) if compiler is not None else _no_check
+
+
+def _validate_schema(data: Any, schema: dict, path: str = "", **kwargs: Any) -> list[str]:
+    """Returns list of error strings. Empty list = valid."""
+    errors: list[str] = []
+    _compile(schema, path)(data, errors)
     return errors
 
 
-# Subprocess runner script — serialized as a string, run with -c
-_RUNNER = r"""
-import json, sys
+class _FirstError(Exception):
+    pass
+
+
+class _StopAtFirst(list):
+    """Error list that aborts the running check as soon as one error is recorded."""
+
+    def append(self, error: str) -> None:
+        super().append(error)
+        raise _FirstError
+
+
+@functools.lru_cache(maxsize=256)
+def _manifest_checks(manifest: ToolManifest) -> tuple[_Check, _Check]:
+    """Compiled (input, output) validators; manifests are frozen and hashable."""
+    return _compile(manifest.input_schema, "input"), _compile(manifest.output_schema, "output")
+
+
+# Subprocess runner script — serialized as a string, run with -c.
+# A payload is one tool call, or {"batch": [payload, ...]} answered with {"results": [...]}.
+_RUNNER_LIB = r"""
+import json, signal, sys, time
 try:
     import resource
 except ImportError:
     resource = None
 
-def main():
+class _ToolTimeout(BaseException):  # not Exception: a tool's "except Exception" can't swallow it
+    pass
+
+def _on_alarm(signum, frame):
+    raise _ToolTimeout()
+
+def _run_one(payload):
+    use_itimer = hasattr(signal, "setitimer")
+    started = time.monotonic()
     try:
-        payload = json.loads(sys.stdin.read())
-        max_mb = payload.get("max_memory_mb", 256)
+        if use_itimer:  # armed before the import: loading the tool counts toward its timeout
+            signal.signal(signal.SIGALRM, _on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, payload["timeout_seconds"])
+        try:
+            import importlib.util
+            spec = importlib.util.spec_from_file_location("_tool", payload["tool_module_path"])
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)
+            result = mod.ToolPlugin.execute(payload["input"])
+        finally:
+            if use_itimer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        out = {"ok": True, "data": result, "error": None}
+    except _ToolTimeout:
+        out = {"ok": False, "data": None, "error": "timeout", "timeout": True}
+    except MemoryError:
+        out = {"ok": False, "data": None, "error": "MemoryError: resource limit"}
+    except Exception as exc:
+        out = {"ok": False, "data": None, "error": f"{type(exc).__name__}: {exc}"}
+    out["duration_ms"] = int((time.monotonic() - started) * 1000)
+    try:
+        return json.dumps(out)
+    except (TypeError, ValueError) as exc:
+        return json.dumps({"ok": False, "data": None, "error": f"{type(exc).__name__}: {exc}"})
+
+def _handle(payload):
+    try:
+        items = payload["batch"] if "batch" in payload else [payload]
+        # One address space per process: a batch runs under its strictest limit
+        max_mb = min(p.get("max_memory_mb", 256) for p in items)
         limit = max_mb * 1024 * 1024
         if resource:
             try:
                 resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
             except (ValueError, resource.error):
                 pass  # May fail in containers — best effort
-        import importlib.util
-        spec = importlib.util.spec_from_file_location("_tool", payload["tool_module_path"])
-        mod = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        result = mod.ToolPlugin.execute(payload["input"])
-        print(json.dumps({"ok": True, "data": result, "error": None}))
+        results = [_run_one(p) for p in items]
+        if "batch" in payload:
+            return '{"results": [' + ", ".join(results) + "]}"
+        return results[0]
     except MemoryError:
-        print(json.dumps({"ok": False, "data": None, "error": "MemoryError: resource limit"}))
-        sys.exit(0)
+        return json.dumps({"ok": False, "data": None, "error": "MemoryError: resource limit"})
+    except Exception as exc:
+        return json.dumps({"ok": False, "data": None, "error": f"{type(exc).__name__}: {exc}"})
+"""
+
+_RUNNER = (
+    _RUNNER_LIB
+    + r"""
+def main():
+    try:
+        print(_handle(json.loads(sys.stdin.read())))
     except Exception as exc:
         print(json.dumps({"ok": False, "data": None, "error": f"{type(exc).__name__}: {exc}"}))
-        sys.exit(0)
+    sys.exit(0)
 main()
 """
+)
+
+# Persistent worker: reads {"deadline": s, "cwd": ..., "env": {...}, "job": payload} lines
+# on stdin and forks a fresh child per job, so every call still gets its own address space
+# and rlimit while the interpreter start-up is paid once. The child switches to the caller's
+# current cwd and environment, not the ones the worker inherited when it started. Replies
+# are one JSON line each: {"status": "ok", "result": ...} | {"status": "timeout"} |
+# {"status": "exit", "code": n, "stderr": "..."}
+_WORKER_SCRIPT = (
+    _RUNNER_LIB
+    + r"""
+import os, select
+
+_STDERR_KEPT = 500
+
+def _fork_one(job, deadline, cwd, env):
+    r, w = os.pipe()
+    er, ew = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.setpgid(0, 0)  # own process group, so a timeout also kills what the tool spawned
+            os.close(r)
+            os.close(er)
+            null = os.open(os.devnull, os.O_RDWR)
+            os.dup2(null, 0)  # stdin/stdout are the worker protocol — keep tools off them
+            os.dup2(null, 1)
+            os.dup2(ew, 2)
+            try:
+                os.chdir(cwd)
+                os.environ.clear()
+                os.environ.update(env)
+            except OSError as exc:  # e.g. the caller's cwd was removed
+                error = f"{type(exc).__name__}: {exc}"
+                data = json.dumps({"ok": False, "data": None, "error": error})
+            else:
+                data = _handle(job)
+            data = data.encode()
+            while data:
+                data = data[os.write(w, data):]
+        finally:
+            os._exit(0)
+    os.close(w)
+    os.close(ew)
+    try:
+        os.setpgid(pid, pid)  # also set from this side: no window before the child runs
+    except OSError:
+        pass  # child already did it (or has exited)
+    chunks, err, timed_out = [], b"", False
+    fds = [r, er]
+    end = time.monotonic() + deadline
+    while r in fds:  # stderr is drained alongside so a chatty tool cannot block on it
+        left = end - time.monotonic()
+        ready = select.select(fds, [], [], left)[0] if left > 0 else []
+        if not ready:
+            timed_out = True
+            break
+        for fd in ready:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                fds.remove(fd)
+            elif fd == r:
+                chunks.append(chunk)
+            elif len(err) < _STDERR_KEPT:
+                err += chunk
+    try:
+        # Still unreaped, so the group id cannot have been reused. Kills an overrunning
+        # child and anything the tool started that would otherwise outlive the call.
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+    _, status = os.waitpid(pid, 0)
+    if er in fds and len(err) < _STDERR_KEPT and select.select([er], [], [], 0)[0]:
+        err += os.read(er, 65536)  # written just before the child exited
+    os.close(r)
+    os.close(er)
+    if timed_out:
+        return '{"status": "timeout"}'
+    out = b"".join(chunks).decode().strip()
+    if not out:
+        code = os.waitstatus_to_exitcode(status)
+        stderr = err[:_STDERR_KEPT].decode(errors="replace")
+        return json.dumps({"status": "exit", "code": code, "stderr": stderr})
+    return '{"status": "ok", "result": ' + out + "}"
+
+def main():
+    for line in sys.stdin.buffer:
+        req = json.loads(line)
+        reply = _fork_one(req["job"], req["deadline"], req["cwd"], req["env"])
+        sys.stdout.write(reply + "\n")
+        sys.stdout.flush()
+main()
+"""
+)
+
+# The runner enforces timeout_seconds itself via SIGALRM where available; the parent
+# only SIGKILLs after this grace period (e.g. a tool stuck in C code or in module import).
+_KILL_GRACE_SECONDS = 2.0 if hasattr(signal, "setitimer") else 0.0
 
 
 def validate_paths(arguments: dict, manifest: ToolManifest) -> None:
     """Validate path-like values against manifest.allowed_paths. Raises PathTraversalError."""
     if not manifest.allowed_paths:
         return
-    allowed_bases = [Path(p).resolve() for p in manifest.allowed_paths]
-
-    def check(value: Any) -> None:
-        if not isinstance(value, str):
-            return
+    allowed_bases = manifest._canonical_allowed
+    allowed_prefixes = manifest._allowed_prefixes
+    # Memoised per call only — symlinks may change between tool calls.
+    checked: set[str] = set()
+    for value in arguments.values():
+        if not isinstance(value, str) or value in checked:
+            continue
         if "/" not in value and not value.startswith("."):
-            return
+            continue
         try:
-            resolved = Path(value).resolve()
+            resolved = os.path.realpath(value)
         except (OSError, ValueError):
             raise PathTraversalError(f"Path {value!r} could not be resolved — rejecting as unsafe")
-        if not any(
-            resolved == base or str(resolved).startswith(str(base) + os.sep)
-            for base in allowed_bases
-        ):
+        if resolved not in allowed_bases and not resolved.startswith(allowed_prefixes):
             raise PathTraversalError(
                 f"Path {value!r} → {resolved} is outside allowed: {manifest.allowed_paths}"
             )
-
-    for v in arguments.values():
-        check(v)
+        checked.add(value)
 
 
 def validate_input(arguments: dict, manifest: ToolManifest) -> None:
     """Validate arguments against manifest.input_schema using stdlib validator."""
-    errors = _validate_schema(arguments, manifest.input_schema, path="input")
+    if manifest._input_trivial and isinstance(arguments, dict):
+        return
+    errors: list[str] = []
+    _manifest_checks(manifest)[0](arguments, errors)
     if errors:
         raise ToolInputValidationError(
             f"Tool {manifest.name!r} input validation failed: {'; '.join(errors)}"
         )
 
 
-def validate_output(data: dict, manifest: ToolManifest) -> None:
-    """Validate output against manifest.output_schema."""
-    errors = _validate_schema(data, manifest.output_schema, path="output")
+def validate_output(data: dict, manifest: ToolManifest, all_errors: bool = False) -> None:
+    """Validate output against manifest.output_schema; stops at the first error by default."""
+    if manifest._output_trivial and isinstance(data, dict):
+        return
+    errors: list[str] = [] if all_errors else _StopAtFirst()
+    try:
+        _manifest_checks(manifest)[1](data, errors)
+    except _FirstError:
+        pass
     if errors:
         raise ToolOutputValidationError(
             f"Tool {manifest.name!r} output validation failed: {'; '.join(errors)}"
         )
 
 
+def _payload(manifest: ToolManifest, arguments: dict, tool_module_path: str) -> dict:
+    return {
+        "tool_module_path": tool_module_path,
+        "input": arguments,
+        "max_memory_mb": manifest.max_memory_mb,
+        "timeout_seconds": manifest.timeout_seconds,
+    }
+
+
+class _ToolWorker:
+    """One long-lived runner process that forks a child per tool call (see _WORKER_SCRIPT)."""
+
+    def __init__(self) -> None:
+        import subprocess  # deferred: only needed once a tool actually runs
+
+        self._proc = subprocess.Popen(
+            [sys.executable, "-c", _WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,  # only the worker's own crash output; tools get a pipe per job
+        )
+        self._buf = b""
+
+    @property
+    def pid(self) -> int:
+        return self._proc.pid
+
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def run(self, payload: str, deadline: float, backstop: float) -> dict | None:
+        """Send one job; returns the worker's reply, or None if none arrived by backstop.
+        The job runs in this process's current cwd and environment."""
+        assert self._proc.stdin is not None and self._proc.stdout is not None
+        context = f'"cwd": {json.dumps(os.getcwd())}, "env": {json.dumps(dict(os.environ))}'
+        self._proc.stdin.write(
+            f'{{"deadline": {deadline}, {context}, "job": {payload}}}\n'.encode()
+        )
+        self._proc.stdin.flush()
+        fd = self._proc.stdout.fileno()
+        end = time.monotonic() + backstop
+        while b"\n" not in self._buf:
+            left = end - time.monotonic()
+            if left <= 0 or not select.select([fd], [], [], left)[0]:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError(f"tool worker exited. stderr: {self._stderr_tail()}")
+            self._buf += chunk
+        line, _, self._buf = self._buf.partition(b"\n")
+        return _DECODER.decode(line.decode())
+
+    def _stderr_tail(self) -> str:
+        assert self._proc.stderr is not None
+        self.close()
+        return self._proc.stderr.read(500).decode(errors="replace")
+
+    def close(self) -> None:
+        if self.alive():
+            self._proc.kill()
+        self._proc.wait()
+
+
+# Idle workers. A call checks one out for its whole run, so concurrent calls each get
+# their own worker (started on demand) instead of queueing; the lock only guards the list.
+# At most _MAX_IDLE_WORKERS are kept: the rest of a concurrency burst is closed on return.
+_MAX_IDLE_WORKERS = 2
+_IDLE_WORKERS: list[_ToolWorker] = []
+_WORKERS_LOCK = threading.Lock()
+
+
+def _checkout_worker() -> _ToolWorker | None:
+    """An idle worker, or a newly started one. None where fork is unavailable."""
+    if not hasattr(os, "fork"):
+        return None
+    with _WORKERS_LOCK:
+        while _IDLE_WORKERS:
+            worker = _IDLE_WORKERS.pop()
+            if worker.alive():
+                return worker
+            worker.close()
+    return _ToolWorker()
+
+
+def _checkin_worker(worker: _ToolWorker) -> None:
+    with _WORKERS_LOCK:
+        if len(_IDLE_WORKERS) < _MAX_IDLE_WORKERS:
+            _IDLE_WORKERS.append(worker)
+            return
+    worker.close()
+
+
+@atexit.register
+def _close_idle_workers() -> None:
+    with _WORKERS_LOCK:
+        workers = _IDLE_WORKERS[:]
+        _IDLE_WORKERS.clear()
+    for worker in workers:
+        worker.close()
+
+
+def _decode_output(stdout: str, label: str) -> dict:
+    stdout = stdout.strip()
+    if not stdout:
+        raise ToolSandboxError(f"Tool {label!r} produced no output")
+    try:
+        return _DECODER.decode(stdout)
+    except json.JSONDecodeError as e:
+        raise ToolSandboxError(f"Tool {label!r} returned malformed JSON: {e}") from e
+
+
+def _timed_out(label: str, timeout: float, started: float) -> ToolTimeoutError:
+    ms = int((time.monotonic() - started) * 1000)
+    _log.error("sandbox timeout", extra={"tool": label, "elapsed_ms": ms})
+    return ToolTimeoutError(f"Tool {label!r} exceeded timeout of {timeout}s")
+
+
+def _spawn(payload: str, timeout: float, label: str, started: float) -> dict:
+    """Run the runner on payload (via a persistent worker if possible); returns its JSON output."""
+    worker = _checkout_worker()
+    if worker is None:
+        return _spawn_once(payload, timeout, label, started)
+    try:
+        reply = worker.run(
+            payload, timeout + _KILL_GRACE_SECONDS, timeout + 2 * _KILL_GRACE_SECONDS + 1
+        )
+    except (OSError, EOFError, ValueError) as exc:
+        worker.close()
+        raise ToolSandboxError(f"Tool {label!r} worker failed: {exc}") from exc
+    if reply is None:
+        worker.close()
+        raise _timed_out(label, timeout, started)
+    _checkin_worker(worker)
+    status = reply.get("status")
+    if status == "timeout":
+        raise _timed_out(label, timeout, started)
+    if status == "exit":
+        _log.error("sandbox crash", extra={"tool": label, "rc": reply.get("code")})
+        if reply.get("code"):
+            stderr = reply.get("stderr", "")
+            raise ToolSandboxError(
+                f"Tool {label!r} exited with code {reply['code']}. stderr: {stderr}"
+            )
+        raise ToolSandboxError(f"Tool {label!r} produced no output")
+    return reply["result"]
+
+
+def _spawn_once(payload: str, timeout: float, label: str, started: float) -> dict:
+    """Run the runner script in a fresh interpreter (platforms without fork)."""
+    import subprocess  # deferred: only needed once a tool actually runs
+
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-c", _RUNNER],
+            input=payload,
+            capture_output=True,
+            text=True,
+            timeout=timeout + _KILL_GRACE_SECONDS,
+            # shell=False is the default — kept explicit via list args
+        )
+    except subprocess.TimeoutExpired:
+        raise _timed_out(label, timeout, started) from None
+
+    if proc.returncode != 0:
+        stderr = (proc.stderr or "")[:500]
+        _log.error("sandbox crash", extra={"tool": label, "rc": proc.returncode})
+        raise ToolSandboxError(
+            f"Tool {label!r} exited with code {proc.returncode}. stderr: {stderr}"
+        )
+
+    return _decode_output(proc.stdout or "", label)
+
+
 def run_tool_sandboxed(
     manifest: ToolManifest, arguments: dict, tool_module_path: str
 ) -> ToolResult:
@@ -180,50 +601,19 @@ def run_tool_sandboxed(
     validate_input(arguments, manifest)
     validate_paths(arguments, manifest)
 
-    payload = json.dumps(
-        {
-            "tool_module_path": tool_module_path,
-            "input": arguments,
-            "max_memory_mb": manifest.max_memory_mb,
-        }
-    )
+    payload = json.dumps(_payload(manifest, arguments, tool_module_path))
 
     _log.debug("sandbox spawn", extra={"tool": manifest.name, "timeout": manifest.timeout_seconds})
 
-    try:
-        proc = subprocess.run(
-            [sys.executable, "-c", _RUNNER],
-            input=payload,
-            capture_output=True,
-            text=True,
-            timeout=manifest.timeout_seconds,
-            # shell=False is the default — kept explicit via list args
-        )
-    except subprocess.TimeoutExpired:
-        ms = int((time.monotonic() - started) * 1000)
+    payload_out = _spawn(payload, manifest.timeout_seconds, manifest.name, started)
+    ms = int((time.monotonic() - started) * 1000)
+
+    if payload_out.get("timeout"):
         _log.error("sandbox timeout", extra={"tool": manifest.name, "elapsed_ms": ms})
         raise ToolTimeoutError(
             f"Tool {manifest.name!r} exceeded timeout of {manifest.timeout_seconds}s"
         )
 
-    ms = int((time.monotonic() - started) * 1000)
-
-    if proc.returncode != 0:
-        stderr = (proc.stderr or "")[:500]
-        _log.error("sandbox crash", extra={"tool": manifest.name, "rc": proc.returncode})
-        raise ToolSandboxError(
-            f"Tool {manifest.name!r} exited with code {proc.returncode}. stderr: {stderr}"
-        )
-
-    stdout = (proc.stdout or "").strip()
-    if not stdout:
-        raise ToolSandboxError(f"Tool {manifest.name!r} produced no output")
-
-    try:
-        payload_out = json.loads(stdout)
-    except json.JSONDecodeError as e:
-        raise ToolSandboxError(f"Tool {manifest.name!r} returned malformed JSON: {e}") from e
-
     if not payload_out.get("ok", False):
         return ToolResult(
             ok=False,
@@ -238,3 +628,143 @@ def run_tool_sandboxed(
     validate_output(data, manifest)
 
     return ToolResult(ok=True, tool_name=manifest.name, tool_call_id="", data=data, duration_ms=ms)
+
+
+class _InProcessTimeoutError(BaseException):  # see _ToolTimeout in _RUNNER_LIB
+    pass
+
+
+def _raise_timeout(signum: int, frame: Any) -> None:
+    raise _InProcessTimeoutError()
+
+
+def run_tool_inprocess(
+    manifest: ToolManifest, arguments: dict, tool_module_path: str
+) -> ToolResult:
+    """
+    Execute a tool in THIS process — same validation and ToolResult shape as
+    run_tool_sandboxed, without the interpreter spawn.
+
+    NOT a security boundary: no memory limit and no process isolation. The timeout
+    is enforced with SIGALRM only when called from the main thread. Use for trusted
+    tools (built-ins, tests) where sandbox overhead dominates the work.
+    """
+    import importlib.util
+
+    started = time.monotonic()
+
+    validate_input(arguments, manifest)
+    validate_paths(arguments, manifest)
+
+    use_alarm = (
+        hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    )
+    previous: Any = None
+    try:
+        if use_alarm:
+            previous = signal.signal(signal.SIGALRM, _raise_timeout)
+            signal.setitimer(signal.ITIMER_REAL, manifest.timeout_seconds)
+        try:
+            spec = importlib.util.spec_from_file_location("_tool", tool_module_path)
+            if spec is None or spec.loader is None:
+                raise ImportError(f"Cannot load tool module from {tool_module_path}")
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)
+            data = mod.ToolPlugin.execute(arguments)
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous)
+    except _InProcessTimeoutError:
+        ms = int((time.monotonic() - started) * 1000)
+        _log.error("inprocess timeout", extra={"tool": manifest.name, "elapsed_ms": ms})
+        raise ToolTimeoutError(
+            f"Tool {manifest.name!r} exceeded timeout of {manifest.timeout_seconds}s"
+        ) from None
+    except Exception as exc:
+        return ToolResult(
+            ok=False,
+            tool_name=manifest.name,
+            tool_call_id="",
+            error_type="ToolExecutionError",
+            error_message=f"{type(exc).__name__}: {exc}",
+            duration_ms=int((time.monotonic() - started) * 1000),
+        )
+
+    data = data or {}
+    validate_output(data, manifest)
+    ms = int((time.monotonic() - started) * 1000)
+    return ToolResult(ok=True, tool_name=manifest.name, tool_call_id="", data=data, duration_ms=ms)
+
+
+def run_tools_sandboxed(batch: list[tuple[ToolManifest, dict, str]]) -> list[ToolResult]:
+    """
+    Execute several (manifest, arguments, tool_module_path) calls in ONE subprocess.
+
+    Input and path validation run for every item before anything is spawned and raise
+    as in run_tool_sandboxed. Per-item timeouts and output validation failures come back
+    as ToolResult(ok=False) so one bad item does not discard the rest. The batch runs
+    under the smallest max_memory_mb of its items; the parent backstop timeout is the
+    sum of the item timeouts.
+    """
+    if not batch:
+        return []
+    started = time.monotonic()
+
+    for manifest, arguments, _ in batch:
+        validate_input(arguments, manifest)
+        validate_paths(arguments, manifest)
+
+    payload = json.dumps({"batch": [_payload(m, a, p) for m, a, p in batch]})
+    names = ",".join(m.name for m, _, _ in batch)
+    total_timeout = sum(m.timeout_seconds for m, _, _ in batch)
+
+    _log.debug("sandbox spawn", extra={"tool": names, "timeout": total_timeout})
+
+    payload_out = _spawn(payload, total_timeout, names, started)
+    items = payload_out.get("results")
+    if not isinstance(items, list) or len(items) != len(batch):
+        raise ToolSandboxError(
+            f"Tool batch {names!r} failed: {payload_out.get('error', 'malformed results')}"
+        )
+
+    results: list[ToolResult] = []
+    for (manifest, _, _), out in zip(batch, items, strict=True):
+        ms = out.get("duration_ms", 0)
+        error_type: str | None = None
+        error_message: str | None = None
+        data = out.get("data") or {}
+        if out.get("timeout"):
+            error_type = "ToolTimeoutError"
+            error_message = (
+                f"Tool {manifest.name!r} exceeded timeout of {manifest.timeout_seconds}s"
+            )
+        elif not out.get("ok", False):
+            error_type = "ToolExecutionError"
+            error_message = out.get("error", "Unknown")
+        else:
+            try:
+                validate_output(data, manifest)
+            except ToolOutputValidationError as exc:
+                error_type, error_message = type(exc).__name__, str(exc)
+        if error_type is not None:
+            _log.error(
+                "sandbox batch item failed", extra={"tool": manifest.name, "error": error_type}
+            )
+            results.append(
+                ToolResult(
+                    ok=False,
+                    tool_name=manifest.name,
+                    tool_call_id="",
+                    error_type=error_type,
+                    error_message=error_message,
+                    duration_ms=ms,
+                )
+            )
+        else:
+            results.append(
+                ToolResult(
+                    ok=True, tool_name=manifest.name, tool_call_id="", data=data, duration_ms=ms
+                )
+            )
+    return results
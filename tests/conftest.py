@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import dataclasses
 import pytest
 import inspect
 
@@ -26,12 +27,28 @@ from aria.models.types import (
 
 
 @pytest.fixture
-def tmp_db(tmp_path):
-    s = SQLiteStorage(str(tmp_path / "test.db"))
+def tmp_db():
+    s = SQLiteStorage(":memory:")
     yield s
     s.close()
 
 
+@pytest.fixture(scope="session")
+def default_manifest():
+    """make_manifest() with its defaults. Manifests are frozen, so one serves every test."""
+    return make_manifest()
+
+
+@pytest.fixture(scope="session")
+def fs_tree(tmp_path_factory):
+    """Read-only tree shared by path tests: allowed/a/b/c/, allowed/hello.txt and secret/."""
+    root = tmp_path_factory.mktemp("fs_tree")
+    (root / "allowed" / "a" / "b" / "c").mkdir(parents=True)
+    (root / "allowed" / "hello.txt").write_text("hello world")
+    (root / "secret").mkdir()
+    return root
+
+
 @pytest.fixture
 def test_config(tmp_path):
     return KernelConfig(
@@ -40,7 +57,7 @@ def test_config(tmp_path):
         max_steps=5,
         max_cost_usd=0.10,
         db_path=str(tmp_path / "test.db"),
-        log_path=str(tmp_path / "test.jsonl"),
+        log_path=None,
         plugin_dirs=(),
         allowed_permissions=frozenset(
             {
@@ -53,9 +70,12 @@ def test_config(tmp_path):
 
 
 class MockProvider:
+    __slots__ = ("_responses", "_call_count", "_default", "calls")
+
     def __init__(self, responses=None):
-        self._responses = list(responses or [])
+        self._responses = tuple(responses or ())
         self._call_count = 0
+        self._default = make_final_answer("Mock response")
         self.calls = []
 
     @property
@@ -64,11 +84,12 @@ class MockProvider:
 
     def call(self, request):
         self.calls.append(request)
-        self._call_count += 1
-        if self._responses:
-            idx = min(self._call_count - 1, len(self._responses) - 1)
-            return self._responses[idx]
-        return make_final_answer("Mock response")
+        responses = self._responses
+        idx = self._call_count
+        self._call_count = idx + 1
+        if not responses:
+            return self._default
+        return responses[idx] if idx < len(responses) else responses[-1]
 
     def estimate_tokens(self, request):
         return 100
@@ -100,10 +121,11 @@ def make_tool_call(tool_name, args):
     )
 
 
-def make_manifest(name="test_tool", permissions=None, timeout=10, allowed_paths=None):
+def make_manifest(name="test_tool", permissions=None, timeout=10, allowed_paths=None, **overrides):
+    """A valid ToolManifest; any other field (e.g. input_schema) can be overridden."""
     from aria.models.types import ToolManifest
 
-    return ToolManifest(
+    manifest = ToolManifest(
         name=name,
         version="1.0.0",
         description="A test tool for unit testing purposes only.",
@@ -123,3 +145,4 @@ def make_manifest(name="test_tool", permissions=None, timeout=10, allowed_paths=
         },
         allowed_paths=tuple(allowed_paths or []),
     )
+    return dataclasses.replace(manifest, **overrides) if overrides else manifest
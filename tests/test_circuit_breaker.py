@@ -2,14 +2,20 @@
 
 from __future__ import annotations
 
-import time
-
 import pytest
 
 from aria.models.errors import CircuitBreakerOpenError
 from aria.models.providers.circuit_breaker import CBState, CircuitBreaker
 
 
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
 class TestCircuitBreaker:
     def test_initial_state_closed(self):
         assert CircuitBreaker("t").state == CBState.CLOSED
@@ -37,23 +43,26 @@ class TestCircuitBreaker:
         assert cb.state == CBState.CLOSED
 
     def test_half_open_after_recovery(self):
-        cb = CircuitBreaker("t", failure_threshold=1, recovery_seconds=0.05)
+        clock = _FakeClock()
+        cb = CircuitBreaker("t", failure_threshold=1, recovery_seconds=0.05, clock=clock)
         cb.record_failure()
-        time.sleep(0.1)
+        clock.now += 0.1
         assert cb.state == CBState.HALF_OPEN
 
     def test_half_open_success_closes(self):
-        cb = CircuitBreaker("t", failure_threshold=1, recovery_seconds=0.05)
+        clock = _FakeClock()
+        cb = CircuitBreaker("t", failure_threshold=1, recovery_seconds=0.05, clock=clock)
         cb.record_failure()
-        time.sleep(0.1)
+        clock.now += 0.1
         _ = cb.state  # trigger half_open
         cb.record_success()
         assert cb.state == CBState.CLOSED
 
     def test_half_open_failure_reopens(self):
-        cb = CircuitBreaker("t", failure_threshold=1, recovery_seconds=0.05)
+        clock = _FakeClock()
+        cb = CircuitBreaker("t", failure_threshold=1, recovery_seconds=0.05, clock=clock)
         cb.record_failure()
-        time.sleep(0.1)
+        clock.now += 0.1
         _ = cb.state  # trigger half_open
         cb.record_failure()
         assert cb.state == CBState.OPEN
@@ -73,9 +82,10 @@ class TestCircuitBreaker:
         assert "anthropic" in str(exc.value)
 
     def test_failures_outside_window_expire(self):
-        cb = CircuitBreaker("t", failure_threshold=3, window_seconds=0.05)
+        clock = _FakeClock()
+        cb = CircuitBreaker("t", failure_threshold=3, window_seconds=0.05, clock=clock)
         cb.record_failure()
         cb.record_failure()
-        time.sleep(0.1)  # window expires
+        clock.now += 0.1  # window expires
         cb.record_failure()
         assert cb.state == CBState.CLOSED  # only 1 in window
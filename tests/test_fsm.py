@@ -79,3 +79,11 @@ class TestSessionFSM:
             fsm.transition(SessionStatus.FAILED)
         assert "IDLE" in str(ei.value)
         assert "FAILED" in str(ei.value)
+
+    def test_history_is_a_snapshot(self):
+        fsm = SessionFSM("s1")
+        fsm.transition(SessionStatus.RUNNING)
+        h = fsm.transition_history()
+        fsm.transition(SessionStatus.DONE)
+        assert h == [(SessionStatus.IDLE, SessionStatus.RUNNING)]
+        assert fsm.transition_history()[-1] == (SessionStatus.RUNNING, SessionStatus.DONE)
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import dataclasses
+
 import pytest
 
 from aria.kernel.kernel import AgentKernel
@@ -15,10 +17,8 @@ from tests.conftest import MockProvider, make_final_answer, make_tool_call
 
 def _build(config: KernelConfig, storage: SQLiteStorage, provider: MockProvider):
     """Wire up a kernel with mock provider."""
-    import dataclasses
-
     # Override primary_provider to "mock"
-    cfg2 = KernelConfig(**{**dataclasses.asdict(config), "primary_provider": "mock"})
+    cfg2 = dataclasses.replace(config, primary_provider="mock")
     registry = ToolRegistry(cfg2)
     registry.build()
     router = ModelRouter(providers={"mock": provider}, audit_writer=storage)
@@ -28,8 +28,9 @@ def _build(config: KernelConfig, storage: SQLiteStorage, provider: MockProvider)
 
 
 @pytest.fixture
-def storage(tmp_path):
-    s = SQLiteStorage(str(tmp_path / "int.db"))
+def storage():
+    # Private in-memory DB per test: no file I/O, and safe to run under pytest -n
+    s = SQLiteStorage(":memory:")
     yield s
     s.close()
 
@@ -40,7 +41,7 @@ def config(tmp_path):
         max_steps=5,
         max_cost_usd=1.0,
         db_path=str(tmp_path / "int.db"),
-        log_path=str(tmp_path / "int.jsonl"),
+        log_path=None,
         allowed_permissions=frozenset(
             {
                 ToolPermission.NONE,
@@ -99,7 +100,7 @@ class TestKernelIntegration:
             max_steps=2,
             max_cost_usd=1.0,
             db_path=str(tmp_path / "lim.db"),
-            log_path=str(tmp_path / "lim.jsonl"),
+            log_path=None,
             allowed_permissions=frozenset({ToolPermission.NONE, ToolPermission.FILESYSTEM_READ}),
         )
         storage = SQLiteStorage(str(tmp_path / "lim.db"))
@@ -123,9 +124,7 @@ class TestKernelIntegration:
         provider = MagicMock()
         provider.name = "mock"
         provider.call.side_effect = ModelProviderExhaustedError("All retries", attempts=3)
-        import dataclasses
-
-        cfg2 = KernelConfig(**{**dataclasses.asdict(config), "primary_provider": "mock"})
+        cfg2 = dataclasses.replace(config, primary_provider="mock")
         registry = ToolRegistry(cfg2)
         registry.build()
         router = ModelRouter(providers={"mock": provider}, audit_writer=storage)
@@ -149,9 +148,7 @@ class TestKernelIntegration:
                 make_final_answer("Saw tool result"),
             ]
         )
-        import dataclasses
-
-        cfg2 = KernelConfig(**{**dataclasses.asdict(config), "primary_provider": "mock"})
+        cfg2 = dataclasses.replace(config, primary_provider="mock")
         registry = ToolRegistry(cfg2)
         registry.build()
         router = ModelRouter(providers={"mock": provider}, audit_writer=storage)
@@ -159,3 +156,22 @@ class TestKernelIntegration:
         kernel.run(SessionRequest(task="Multi-step"))
         # Should have made 2 provider calls (tool call + final answer)
         assert len(provider.calls) >= 1
+
+
+class TestPromptHasher:
+    def test_matches_hash_of_full_history(self):
+        import json
+
+        from aria.kernel.kernel import _PromptHasher
+        from aria.models.types import Message, MessageRole, sha256_str
+
+        def full(history):
+            return sha256_str(json.dumps([m.to_dict() for m in history]))
+
+        hasher = _PromptHasher()
+        history = ()
+        assert hasher.digest(history) == full(history)
+        for i, role in enumerate([MessageRole.USER, MessageRole.ASSISTANT, MessageRole.TOOL]):
+            history += (Message(role=role, content=f"message {i} — ünïcode"),)
+            assert hasher.digest(history) == full(history)
+        assert hasher.digest(history[:1]) == full(history[:1])
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import pytest
+
+from aria.memory.sqlite import SQLiteStorage
 from aria.models.types import (
     AuditEvent,
     KernelConfig,
@@ -58,6 +61,15 @@ class TestSQLiteMemory:
         tmp_db.set_kv("k", "v2")
         assert tmp_db.get_kv("k") == "v2"
 
+    def test_kv_overwrite_keeps_created_at(self, tmp_db):
+        tmp_db.set_kv("k", "v1")
+        sql = "SELECT created_at, updated_at FROM kv_memory WHERE key='k'"
+        first = tmp_db._conn.execute(sql).fetchone()
+        tmp_db.set_kv("k", "v2")
+        second = tmp_db._conn.execute(sql).fetchone()
+        assert second["created_at"] == first["created_at"]
+        assert second["updated_at"] >= first["updated_at"]
+
     def test_audit_event_written_and_retrieved(self, tmp_db):
         tmp_db.create_session("s1", "T", KernelConfig())
         tmp_db.write_event(
@@ -86,3 +98,128 @@ class TestSQLiteMemory:
         tmp_db.create_session("s2", "T2", KernelConfig())
         tmp_db.append_message("s1", Message(role=MessageRole.USER, content="A"))
         assert tmp_db.get_conversation_history("s2") == []
+
+
+class TestSQLitePragmas:
+    def test_file_db_uses_wal(self, tmp_path):
+        s = SQLiteStorage(str(tmp_path / "p.db"))
+        assert s._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert s._conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        s.close()
+
+    def test_relaxed_durability_disables_sync(self, tmp_path):
+        s = SQLiteStorage(str(tmp_path / "p.db"), durability="relaxed")
+        assert s._conn.execute("PRAGMA synchronous").fetchone()[0] == 0  # OFF
+        s.close()
+
+    def test_memory_db_skips_file_setup(self):
+        s = SQLiteStorage(":memory:")
+        assert s._conn.execute("PRAGMA journal_mode").fetchone()[0] == "memory"
+        s.set_kv("k", 1)
+        assert s.get_kv("k") == 1
+        s.close()
+
+    def test_unknown_durability_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="durability"):
+            SQLiteStorage(str(tmp_path / "p.db"), durability="yolo")
+
+
+class TestWriteEvents:
+    def test_batch_written_and_chain_valid(self, tmp_db):
+        tmp_db.write_events(
+            AuditEvent(session_id="s1", event_type=f"e{i}", level=LogLevel.INFO, payload={"i": i})
+            for i in range(5)
+        )
+        tmp_db.write_event(
+            AuditEvent(session_id="s1", event_type="after", level=LogLevel.INFO, payload={})
+        )
+        assert len(tmp_db.get_session_events("s1")) == 6
+        assert tmp_db.verify_chain("s1")
+
+    def test_failed_batch_leaves_nothing_behind(self, tmp_db):
+        from aria.models.errors import AuditWriteFailureError
+
+        dup = AuditEvent(session_id="s1", event_type="e", level=LogLevel.INFO, payload={})
+        with pytest.raises(AuditWriteFailureError):
+            tmp_db.write_events([dup, dup])  # duplicate event_id
+        assert tmp_db.get_session_events("s1") == []
+        tmp_db.write_event(
+            AuditEvent(session_id="s1", event_type="ok", level=LogLevel.INFO, payload={})
+        )
+        assert tmp_db.verify_chain("s1")
+
+    def test_unserialisable_payload_leaves_chain_intact(self, tmp_db):
+        good = AuditEvent(session_id="s1", event_type="e", level=LogLevel.INFO, payload={})
+        bad = AuditEvent(
+            session_id="s1", event_type="bad", level=LogLevel.INFO, payload={"x": object()}
+        )
+        with pytest.raises(TypeError):
+            tmp_db.write_events([good, bad])
+        tmp_db.write_event(
+            AuditEvent(session_id="s1", event_type="ok", level=LogLevel.INFO, payload={})
+        )
+        assert [e["event_type"] for e in tmp_db.get_session_events("s1")] == ["ok"]
+        assert tmp_db.verify_chain("s1")
+
+
+class TestBatch:
+    def _event(self, name):
+        return AuditEvent(session_id="s1", event_type=name, level=LogLevel.INFO, payload={})
+
+    def test_batch_commits_all_writes(self, tmp_db):
+        tmp_db.create_session("s1", "T", KernelConfig())
+        with tmp_db.batch():
+            tmp_db.write_event(self._event("a"))
+            with tmp_db.batch():  # nested batch joins the outer transaction
+                tmp_db.set_kv("k", "v")
+            assert tmp_db._conn.in_transaction
+        assert not tmp_db._conn.in_transaction
+        assert tmp_db.get_kv("k") == "v"
+        assert len(tmp_db.get_session_events("s1")) == 1
+
+    def test_batch_rollback_restores_chain(self, tmp_db):
+        tmp_db.write_event(self._event("kept"))
+        with pytest.raises(RuntimeError):
+            with tmp_db.batch():
+                tmp_db.write_event(self._event("dropped"))
+                raise RuntimeError("abort")
+        tmp_db.write_event(self._event("after"))
+        assert [e["event_type"] for e in tmp_db.get_session_events("s1")] == ["kept", "after"]
+        assert tmp_db.verify_chain("s1")
+
+    def test_batch_rollback_drops_cached_messages(self, tmp_db):
+        tmp_db.append_message("s1", Message(role=MessageRole.USER, content="kept"))
+        with pytest.raises(RuntimeError):
+            with tmp_db.batch():
+                tmp_db.append_message("s1", Message(role=MessageRole.USER, content="dropped"))
+                raise RuntimeError("abort")
+        assert [m.content for m in tmp_db.get_conversation_history("s1")] == ["kept"]
+
+    def test_single_write_outside_batch_autocommits(self, tmp_db):
+        tmp_db.write_event(self._event("solo"))
+        assert not tmp_db._conn.in_transaction
+        assert [e["event_type"] for e in tmp_db.get_session_events("s1")] == ["solo"]
+
+
+class TestConversationCache:
+    def test_history_readable_from_fresh_instance(self, tmp_path):
+        path = str(tmp_path / "c.db")
+        a = SQLiteStorage(path, durability="relaxed")
+        a.append_message("s1", Message(role=MessageRole.USER, content="one"))
+        a.append_message("s1", Message(role=MessageRole.ASSISTANT, content="two"))
+        b = SQLiteStorage(path, durability="relaxed")
+        assert [m.content for m in b.get_conversation_history("s1")] == ["one", "two"]
+        a.close()
+        b.close()
+
+    def test_direct_set_kv_invalidates_cache(self, tmp_db):
+        tmp_db.append_message("s1", Message(role=MessageRole.USER, content="old"))
+        tmp_db.set_kv("conv_s1", [], namespace="system")
+        assert tmp_db.get_conversation_history("s1") == []
+
+    def test_history_reuses_message_objects(self, tmp_db):
+        msg = Message(role=MessageRole.USER, content="hi")
+        tmp_db.append_message("s1", msg)
+        first = tmp_db.get_conversation_history("s1")
+        first.clear()  # callers get their own list
+        assert tmp_db.get_conversation_history("s1")[0] is msg
@@ -1,7 +1,5 @@
 """Model router tests."""
 
-from unittest.mock import MagicMock
-
 import pytest
 
 from aria.models.errors import (
@@ -44,6 +42,31 @@ def make_request() -> PromptRequest:
     )
 
 
+class _FlakyProvider:
+    """Raises ``error`` on the first ``fail_first`` calls (every call if None)."""
+
+    __slots__ = ("name", "calls", "fail_first", "error")
+
+    def __init__(self, error, fail_first=None):
+        self.name = "mock"
+        self.calls = 0
+        self.fail_first = fail_first
+        self.error = error
+
+    def call(self, request):
+        self.calls += 1
+        if self.fail_first is None or self.calls <= self.fail_first:
+            raise self.error
+        return _fa("success after retries")
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    import aria.models.router as router_module
+
+    monkeypatch.setattr(router_module.time, "sleep", lambda x: None)
+
+
 class TestModelRouter:
     def test_successful_call(self):
         provider = MockProvider(responses=[_fa("ok")])
@@ -70,67 +93,29 @@ class TestModelRouter:
         with pytest.raises(ValueError):
             ModelRouter(providers={})
 
-    def test_retries_on_provider_error(self):
-        provider = MagicMock()
-        provider.name = "mock"
-        call_count = 0
-
-        def side_effect(req):
-            nonlocal call_count
-            call_count += 1
-            if call_count < 3:
-                raise ModelRateLimitError("Rate limited")
-            return _fa("success after retries")
-
-        provider.call.side_effect = side_effect
+    def test_retries_on_provider_error(self, no_sleep):
+        provider = _FlakyProvider(ModelRateLimitError("Rate limited"), fail_first=2)
         router = ModelRouter(providers={"mock": provider})
-        req = make_request()
-        # Override sleep to speed up test
-        import aria.models.router as router_module
-
-        original_sleep = router_module.time.sleep
-        router_module.time.sleep = lambda x: None
-        try:
-            result = router.call(req)
-            assert result.final_answer == "success after retries"
-            assert call_count == 3
-        finally:
-            router_module.time.sleep = original_sleep
-
-    def test_exhausted_after_max_retries(self):
-        provider = MagicMock()
-        provider.name = "mock"
-        provider.call.side_effect = ModelProviderError("Server error", status_code=500)
+        result = router.call(make_request())
+        assert result.final_answer == "success after retries"
+        assert provider.calls == 3
+
+    def test_exhausted_after_max_retries(self, no_sleep):
+        provider = _FlakyProvider(ModelProviderError("Server error", status_code=500))
         router = ModelRouter(providers={"mock": provider})
-        import aria.models.router as router_module
+        with pytest.raises(ModelProviderExhaustedError) as ei:
+            router.call(make_request())
+        assert ei.value.attempts == 3
 
-        original_sleep = router_module.time.sleep
-        router_module.time.sleep = lambda x: None
-        try:
-            with pytest.raises(ModelProviderExhaustedError) as ei:
-                router.call(make_request())
-            assert ei.value.attempts == 3
-        finally:
-            router_module.time.sleep = original_sleep
-
-    def test_circuit_breaker_trips_and_raises(self):
-        provider = MagicMock()
-        provider.name = "mock"
-        provider.call.side_effect = ModelProviderError("Error", status_code=500)
+    def test_circuit_breaker_trips_and_raises(self, no_sleep):
+        provider = _FlakyProvider(ModelProviderError("Error", status_code=500))
         router = ModelRouter(providers={"mock": provider})
-        import aria.models.router as router_module
-
-        original_sleep = router_module.time.sleep
-        router_module.time.sleep = lambda x: None
-        try:
-            # Trip the CB
-            for _ in range(3):
-                try:
-                    router.call(make_request())
-                except (ModelProviderExhaustedError, CircuitBreakerOpenError):
-                    pass
-        finally:
-            router_module.time.sleep = original_sleep
+        # Trip the CB
+        for _ in range(3):
+            try:
+                router.call(make_request())
+            except (ModelProviderExhaustedError, CircuitBreakerOpenError):
+                pass
 
     def test_circuit_breaker_status_available(self):
         router = ModelRouter(providers={"mock": MockProvider()})
@@ -1,27 +1,57 @@
 """Sandbox tests — tool execution, timeout, output validation."""
 
+import os
+import threading
+import time
+
 import pytest
 
 from aria.models.errors import (
     PathTraversalError,
     ToolInputValidationError,
+    ToolSandboxError,
     ToolTimeoutError,
 )
 from aria.models.types import ToolPermission
-from aria.tools.sandbox import run_tool_sandboxed
+from aria.tools import sandbox
+from aria.tools.builtin import read_file
+from aria.tools.sandbox import run_tool_inprocess, run_tool_sandboxed, run_tools_sandboxed
 from tests.conftest import make_manifest
 
+_READ_PATH = read_file.__file__
+_ANY_OBJECT = {"type": "object", "properties": {}, "additionalProperties": True}
+_OPEN_MANIFEST = make_manifest(input_schema=_ANY_OBJECT, output_schema=_ANY_OBJECT)
+# A tool that tries to outlive its timeout by swallowing whatever interrupts it
+_SWALLOWS_TIMEOUT = """
+import time
+class ToolPlugin:
+    @staticmethod
+    def execute(d):
+        try:
+            time.sleep(3)
+        except Exception as exc:
+            return {"result": f"swallowed {type(exc).__name__}"}
+"""
 
-class TestSandboxExecution:
-    def test_real_tool_executes(self, tmp_path):
-        """read_file executes correctly on a real file."""
-        f = tmp_path / "hello.txt"
-        f.write_text("hello world")
-        import inspect
 
-        from aria.tools.builtin.read_file import ToolPlugin
+def _process_gone(pid: int) -> bool:
+    """True once pid has exited. Uses kill(pid, 0), so it does not rely on procfs."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    try:  # still listed: on Linux, a killed but not yet reaped zombie also counts
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] in "ZX"
+    except OSError:
+        return False
+
 
-        module_path = inspect.getfile(ToolPlugin)
+@pytest.mark.slow
+class TestSandboxExecution:
+    def test_real_tool_executes(self, fs_tree):
+        """read_file executes correctly on a real file."""
+        f = fs_tree / "allowed" / "hello.txt"
         from aria.models.types import ToolManifest, ToolPermission
 
         # Use read_file manifest with allowed path set
@@ -51,9 +81,9 @@ class TestSandboxExecution:
                 "required": ["content", "size_bytes", "truncated"],
                 "additionalProperties": False,
             },
-            allowed_paths=(str(tmp_path),),
+            allowed_paths=(str(f.parent),),
         )
-        result = run_tool_sandboxed(manifest, {"path": str(f)}, module_path)
+        result = run_tool_sandboxed(manifest, {"path": str(f)}, _READ_PATH)
         assert result.ok
         assert result.data["content"] == "hello world"
         assert result.data["size_bytes"] == 11
@@ -67,7 +97,7 @@ import time
 class ToolPlugin:
     @staticmethod
     def execute(d):
-        time.sleep(60)
+        time.sleep(3)
         return {"result": "done"}
 """)
         from aria.models.types import ToolManifest, ToolPermission
@@ -127,11 +157,10 @@ class ToolPlugin:
             run_tool_sandboxed(m, {"value": "/etc/passwd"}, "/fake/path.py")
         # Note: value field has path-like content — checked by validate_paths
 
-    def test_input_validation_fires_before_exec(self):
+    def test_input_validation_fires_before_exec(self, default_manifest):
         """Schema validation fires before subprocess spawns."""
-        m = make_manifest()
         with pytest.raises(ToolInputValidationError):
-            run_tool_sandboxed(m, {}, "/fake/path.py")  # missing "value"
+            run_tool_sandboxed(default_manifest, {}, "/fake/path.py")  # missing "value"
 
     def test_duration_ms_recorded(self, tmp_path):
         """ToolResult includes execution time."""
@@ -160,3 +189,216 @@ class ToolPlugin:
         result = run_tool_sandboxed(m, {}, str(noop))
         assert result.ok
         assert result.duration_ms >= 0
+
+
+@pytest.mark.slow
+class TestSandboxBatch:
+    def test_batch_results_in_order(self, tmp_path):
+        """One subprocess runs every item; failures stay per-item."""
+        echo = tmp_path / "echo.py"
+        echo.write_text("""
+class ToolPlugin:
+    @staticmethod
+    def execute(d): return {"result": d["v"]}
+""")
+        bad = tmp_path / "bad.py"
+        bad.write_text("""
+class ToolPlugin:
+    @staticmethod
+    def execute(d): raise RuntimeError("boom")
+""")
+        results = run_tools_sandboxed(
+            [
+                (make_manifest("echo_a", input_schema=_ANY_OBJECT), {"v": "a"}, str(echo)),
+                (make_manifest("bad_b", input_schema=_ANY_OBJECT), {}, str(bad)),
+                (make_manifest("echo_c", input_schema=_ANY_OBJECT), {"v": 1}, str(echo)),
+            ]
+        )
+        assert [r.tool_name for r in results] == ["echo_a", "bad_b", "echo_c"]
+        assert results[0].ok and results[0].data == {"result": "a"}
+        assert not results[1].ok and "RuntimeError" in (results[1].error_message or "")
+        assert not results[2].ok and results[2].error_type == "ToolOutputValidationError"
+
+    def test_empty_batch(self):
+        assert run_tools_sandboxed([]) == []
+
+
+class TestInProcess:
+    def test_crash_returns_error_result(self, tmp_path):
+        bad = tmp_path / "bad.py"
+        bad.write_text("""
+class ToolPlugin:
+    @staticmethod
+    def execute(d): raise RuntimeError("boom")
+""")
+        result = run_tool_inprocess(make_manifest(input_schema=_ANY_OBJECT), {}, str(bad))
+        assert not result.ok
+        assert result.error_type == "ToolExecutionError"
+        assert result.error_message == "RuntimeError: boom"
+
+    def test_timeout_raises(self, tmp_path):
+        slow = tmp_path / "slow.py"
+        slow.write_text("""
+import time
+class ToolPlugin:
+    @staticmethod
+    def execute(d):
+        time.sleep(3)
+        return {"result": "done"}
+""")
+        with pytest.raises(ToolTimeoutError):
+            run_tool_inprocess(make_manifest(timeout=1, input_schema=_ANY_OBJECT), {}, str(slow))
+
+    def test_tool_cannot_swallow_timeout(self, tmp_path):
+        tool = tmp_path / "swallow.py"
+        tool.write_text(_SWALLOWS_TIMEOUT)
+        with pytest.raises(ToolTimeoutError):
+            run_tool_inprocess(make_manifest(timeout=1, input_schema=_ANY_OBJECT), {}, str(tool))
+
+
+@pytest.mark.slow
+class TestSandboxWorker:
+    def test_worker_reused_and_child_per_call(self, tmp_path):
+        """Calls share one worker process but each runs in a fresh child."""
+        pid_tool = tmp_path / "pid_tool.py"
+        pid_tool.write_text("""
+import os
+class ToolPlugin:
+    @staticmethod
+    def execute(d):
+        print("noise on stdout")
+        return {"pid": os.getpid(), "ppid": os.getppid()}
+""")
+        first = run_tool_sandboxed(_OPEN_MANIFEST, {}, str(pid_tool))
+        second = run_tool_sandboxed(_OPEN_MANIFEST, {}, str(pid_tool))
+        assert first.ok and second.ok
+        assert first.data["ppid"] == second.data["ppid"] == sandbox._IDLE_WORKERS[-1].pid
+        assert first.data["pid"] != second.data["pid"]
+
+    def test_worker_usable_after_timeout(self, tmp_path):
+        slow = tmp_path / "slow.py"
+        slow.write_text("""
+import time
+class ToolPlugin:
+    @staticmethod
+    def execute(d):
+        time.sleep(3)
+""")
+        fast = tmp_path / "fast.py"
+        fast.write_text("""
+class ToolPlugin:
+    @staticmethod
+    def execute(d): return {"result": "ok"}
+""")
+        with pytest.raises(ToolTimeoutError):
+            run_tool_sandboxed(
+                make_manifest(timeout=1, input_schema=_ANY_OBJECT),
+                {},
+                str(slow),
+            )
+        result = run_tool_sandboxed(_OPEN_MANIFEST, {}, str(fast))
+        assert result.ok and result.data == {"result": "ok"}
+
+    def test_timeout_kills_processes_the_tool_spawned(self, tmp_path):
+        pid_file = tmp_path / "grandchild.pid"
+        spawner = tmp_path / "spawner.py"
+        spawner.write_text(f"""
+import subprocess, sys, time
+class ToolPlugin:
+    @staticmethod
+    def execute(d):
+        p = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        open({str(pid_file)!r}, "w").write(str(p.pid))
+        time.sleep(3)
+""")
+        with pytest.raises(ToolTimeoutError):
+            run_tool_sandboxed(
+                make_manifest(timeout=1, input_schema=_ANY_OBJECT),
+                {},
+                str(spawner),
+            )
+        pid = int(pid_file.read_text())
+        for _ in range(50):
+            if _process_gone(pid):
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, 9)
+            pytest.fail("process spawned by the tool outlived the timeout")
+
+    def test_tool_follows_callers_cwd_and_env(self, tmp_path, monkeypatch):
+        where = tmp_path / "where.py"
+        where.write_text("""
+import os
+class ToolPlugin:
+    @staticmethod
+    def execute(d): return {"cwd": os.getcwd(), "tag": os.environ.get("ARIA_TEST_TAG")}
+""")
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        monkeypatch.chdir(tmp_path / "a")
+        run_tool_sandboxed(_OPEN_MANIFEST, {}, str(where))  # worker started from "a"
+        monkeypatch.chdir(tmp_path / "b")
+        monkeypatch.setenv("ARIA_TEST_TAG", "b")
+        result = run_tool_sandboxed(_OPEN_MANIFEST, {}, str(where))
+        assert result.data == {"cwd": str(tmp_path / "b"), "tag": "b"}
+
+    def test_crash_reports_tool_stderr(self, tmp_path):
+        crash = tmp_path / "crash.py"
+        crash.write_text("""
+import os, sys
+class ToolPlugin:
+    @staticmethod
+    def execute(d):
+        sys.stderr.write("fatal: disk on fire\\n")
+        sys.stderr.flush()
+        os._exit(3)
+""")
+        with pytest.raises(ToolSandboxError, match="code 3. stderr: fatal: disk on fire"):
+            run_tool_sandboxed(_OPEN_MANIFEST, {}, str(crash))
+
+    def test_concurrent_calls_do_not_queue(self, tmp_path):
+        nap = tmp_path / "nap.py"
+        nap.write_text("""
+import time
+class ToolPlugin:
+    @staticmethod
+    def execute(d):
+        time.sleep(1)
+        return {}
+""")
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(run_tool_sandboxed(_OPEN_MANIFEST, {}, str(nap)))
+            )
+            for _ in range(3)
+        ]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(results) == 3 and all(r.ok for r in results)
+        assert time.monotonic() - started < 2.5
+        assert len(sandbox._IDLE_WORKERS) <= sandbox._MAX_IDLE_WORKERS  # burst not kept
+
+    def test_tool_cannot_swallow_timeout(self, tmp_path):
+        tool = tmp_path / "swallow.py"
+        tool.write_text(_SWALLOWS_TIMEOUT)
+        with pytest.raises(ToolTimeoutError):
+            run_tool_sandboxed(make_manifest(timeout=1, input_schema=_ANY_OBJECT), {}, str(tool))
+
+    def test_module_import_counts_toward_timeout(self, tmp_path):
+        tool = tmp_path / "slow_import.py"
+        tool.write_text("""
+import time
+time.sleep(3)
+class ToolPlugin:
+    @staticmethod
+    def execute(d): return {"result": "ok"}
+""")
+        started = time.monotonic()
+        with pytest.raises(ToolTimeoutError):
+            run_tool_sandboxed(make_manifest(timeout=1, input_schema=_ANY_OBJECT), {}, str(tool))
+        assert time.monotonic() - started < 2  # the runner's alarm, not the parent backstop
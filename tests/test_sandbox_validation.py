@@ -1,5 +1,7 @@
 """Unit tests for sandbox validation functions (no subprocess needed)."""
 
+import re
+
 import pytest
 
 from aria.models.errors import (
@@ -8,87 +10,174 @@ from aria.models.errors import (
     ToolOutputValidationError,
 )
 from aria.models.types import ToolPermission
-from aria.tools.sandbox import validate_input, validate_output, validate_paths
+from aria.tools.sandbox import (
+    precompile_schema,
+    validate_input,
+    validate_output,
+    validate_paths,
+)
 from tests.conftest import make_manifest
 
 
+@pytest.fixture(scope="module")
+def allowed_manifest(fs_tree):
+    return make_manifest(
+        permissions={ToolPermission.FILESYSTEM_READ}, allowed_paths=(str(fs_tree / "allowed"),)
+    )
+
+
 class TestValidatePaths:
-    def test_within_allowlist_passes(self, tmp_path):
-        m = make_manifest(
-            permissions={ToolPermission.FILESYSTEM_READ}, allowed_paths=(str(tmp_path),)
-        )
-        validate_paths({"path": str(tmp_path / "file.txt")}, m)
+    def test_within_allowlist_passes(self, fs_tree, allowed_manifest):
+        validate_paths({"path": str(fs_tree / "allowed" / "file.txt")}, allowed_manifest)
+
+    def test_dotdot_traversal_blocked(self, fs_tree, allowed_manifest):
+        with pytest.raises(PathTraversalError):
+            validate_paths({"path": f"{fs_tree}/allowed/../../../etc/passwd"}, allowed_manifest)
+
+    def test_etc_blocked(self, allowed_manifest):
+        with pytest.raises(PathTraversalError):
+            validate_paths({"path": "/etc/hosts"}, allowed_manifest)
+
+    def test_sibling_directory_blocked(self, fs_tree, allowed_manifest):
+        with pytest.raises(PathTraversalError):
+            validate_paths({"path": str(fs_tree / "secret" / "key.pem")}, allowed_manifest)
 
-    def test_dotdot_traversal_blocked(self, tmp_path):
+    def test_sibling_with_shared_prefix_blocked(self, tmp_path):
         m = make_manifest(
-            permissions={ToolPermission.FILESYSTEM_READ}, allowed_paths=(str(tmp_path),)
+            permissions={ToolPermission.FILESYSTEM_READ}, allowed_paths=(str(tmp_path / "ws"),)
         )
         with pytest.raises(PathTraversalError):
-            validate_paths({"path": str(tmp_path) + "/../../../etc/passwd"}, m)
+            validate_paths({"path": str(tmp_path / "ws-evil" / "x")}, m)
+
+    def test_symlink_escaping_allowlist_blocked(self, tmp_path):
+        ws, outside = tmp_path / "ws", tmp_path / "outside"
+        ws.mkdir()
+        outside.mkdir()
+        (ws / "link").symlink_to(outside)
+        m = make_manifest(permissions={ToolPermission.FILESYSTEM_READ}, allowed_paths=(str(ws),))
+        with pytest.raises(PathTraversalError):
+            validate_paths({"path": str(ws / "link" / "secret.txt")}, m)
 
-    def test_etc_blocked(self, tmp_path):
+    def test_symlink_within_allowlist_passes(self, tmp_path):
+        (tmp_path / "data").mkdir()
+        (tmp_path / "alias").symlink_to(tmp_path / "data")
         m = make_manifest(
             permissions={ToolPermission.FILESYSTEM_READ}, allowed_paths=(str(tmp_path),)
         )
-        with pytest.raises(PathTraversalError):
-            validate_paths({"path": "/etc/hosts"}, m)
+        validate_paths({"path": str(tmp_path / "alias" / "file.txt")}, m)
+
+    def test_root_allowlist_admits_any_path(self):
+        m = make_manifest(permissions={ToolPermission.FILESYSTEM_READ}, allowed_paths=("/",))
+        validate_paths({"path": "/etc/hosts"}, m)
 
     def test_no_paths_allowed_skips_check(self):
         m = make_manifest(permissions={ToolPermission.NONE}, allowed_paths=())
         validate_paths({"path": "/etc/hosts"}, m)  # no raise
 
-    def test_non_path_string_value_skipped(self, tmp_path):
-        m = make_manifest(
-            permissions={ToolPermission.FILESYSTEM_READ}, allowed_paths=(str(tmp_path),)
-        )
-        validate_paths({"value": "just a regular string"}, m)  # no raise
+    def test_non_path_string_value_skipped(self, allowed_manifest):
+        validate_paths({"value": "just a regular string"}, allowed_manifest)  # no raise
 
-    def test_nested_subdirectory_allowed(self, tmp_path):
-        sub = tmp_path / "a" / "b" / "c"
-        sub.mkdir(parents=True)
-        m = make_manifest(
-            permissions={ToolPermission.FILESYSTEM_READ}, allowed_paths=(str(tmp_path),)
-        )
-        validate_paths({"path": str(sub / "file.txt")}, m)
+    def test_nested_subdirectory_allowed(self, fs_tree, allowed_manifest):
+        sub = fs_tree / "allowed" / "a" / "b" / "c"
+        validate_paths({"path": str(sub / "file.txt")}, allowed_manifest)
 
 
 class TestValidateInput:
-    def test_valid_passes(self):
-        m = make_manifest()
-        validate_input({"value": "hello"}, m)
+    def test_valid_passes(self, default_manifest):
+        validate_input({"value": "hello"}, default_manifest)
 
-    def test_missing_required_raises(self):
-        m = make_manifest()
+    def test_missing_required_raises(self, default_manifest):
         with pytest.raises(ToolInputValidationError, match="required"):
-            validate_input({}, m)
+            validate_input({}, default_manifest)
 
-    def test_wrong_type_raises(self):
-        m = make_manifest()
+    def test_wrong_type_raises(self, default_manifest):
         with pytest.raises(ToolInputValidationError):
-            validate_input({"value": 42}, m)  # int not string
+            validate_input({"value": 42}, default_manifest)  # int not string
 
-    def test_extra_field_raises(self):
-        m = make_manifest()
+    def test_extra_field_raises(self, default_manifest):
         with pytest.raises(ToolInputValidationError):
-            validate_input({"value": "ok", "extra": "bad"}, m)
+            validate_input({"value": "ok", "extra": "bad"}, default_manifest)
 
-    def test_null_raises(self):
-        m = make_manifest()
+    def test_null_raises(self, default_manifest):
         with pytest.raises(ToolInputValidationError):
-            validate_input({"value": None}, m)
+            validate_input({"value": None}, default_manifest)
+
+    def test_all_errors_reported_in_order(self, default_manifest):
+        with pytest.raises(ToolInputValidationError) as ei:
+            validate_input({"extra": 1}, default_manifest)
+        assert str(ei.value).endswith(
+            "input.value: required field missing; input.extra: additional property not allowed"
+        )
+
+    def test_compiled_validators_reused_per_manifest(self, default_manifest):
+        from aria.tools.sandbox import _manifest_checks
+
+        validate_input({"value": "a"}, default_manifest)
+        checks = _manifest_checks(default_manifest)
+        validate_input({"value": "b"}, default_manifest)
+        assert _manifest_checks(default_manifest) is checks
 
 
 class TestValidateOutput:
-    def test_valid_output_passes(self):
-        m = make_manifest()
-        validate_output({"result": "ok"}, m)
+    def test_valid_output_passes(self, default_manifest):
+        validate_output({"result": "ok"}, default_manifest)
 
-    def test_missing_required_output_raises(self):
-        m = make_manifest()
+    def test_missing_required_output_raises(self, default_manifest):
         with pytest.raises(ToolOutputValidationError):
-            validate_output({}, m)
+            validate_output({}, default_manifest)
+
+    def test_wrong_type_output_raises(self, default_manifest):
+        with pytest.raises(ToolOutputValidationError):
+            validate_output({"result": 123}, default_manifest)
+
+    def test_stops_at_first_error_by_default(self, default_manifest):
+        bad = {"extra": 1}  # missing "result" and an additional property
+        with pytest.raises(ToolOutputValidationError) as first:
+            validate_output(bad, default_manifest)
+        assert first.value.args[0].count("output.") == 1
+        with pytest.raises(ToolOutputValidationError) as every:
+            validate_output(bad, default_manifest, all_errors=True)
+        assert every.value.args[0].count("output.") == 2
+
+
+_OPEN_MANIFEST = make_manifest(
+    name="open_tool",
+    input_schema={"type": "object", "additionalProperties": True},
+    output_schema={"type": "object", "properties": {}},
+)
 
-    def test_wrong_type_output_raises(self):
-        m = make_manifest()
+
+class TestTrivialSchema:
+    def test_trivial_flags_computed(self):
+        assert _OPEN_MANIFEST._input_trivial and _OPEN_MANIFEST._output_trivial
+        assert not make_manifest()._input_trivial
+
+    def test_any_object_accepted(self):
+        validate_input({"anything": 1}, _OPEN_MANIFEST)
+        validate_output({"anything": [1, 2]}, _OPEN_MANIFEST)
+
+    def test_non_object_output_still_rejected(self):
         with pytest.raises(ToolOutputValidationError):
-            validate_output({"result": 123}, m)
+            validate_output(["not", "an", "object"], _OPEN_MANIFEST)  # type: ignore[arg-type]
+
+
+_PATTERN_MANIFEST = make_manifest(
+    input_schema={
+        "type": "object",
+        "properties": {"code": {"type": "string", "pattern": "^[A-Z]{3}$"}},
+        "required": ["code"],
+    }
+)
+
+
+class TestPatternValidation:
+    def test_matching_value_passes(self):
+        validate_input({"code": "ABC"}, _PATTERN_MANIFEST)
+
+    def test_non_matching_value_raises(self):
+        with pytest.raises(ToolInputValidationError, match="pattern"):
+            validate_input({"code": "abcd"}, _PATTERN_MANIFEST)
+
+    def test_invalid_pattern_rejected_at_precompile(self):
+        with pytest.raises(re.error):
+            precompile_schema({"type": "object", "properties": {"x": {"pattern": "("}}})
@@ -93,36 +93,20 @@ class TestPathTraversalPrevention:
 
 @pytest.mark.security
 class TestInputValidation:
-    def _manifest(self):
-        return ToolManifest(
-            name="t_tool",
-            version="1.0.0",
-            description="A test tool for input validation testing purposes.",
-            permissions=frozenset({ToolPermission.NONE}),
-            timeout_seconds=5,
-            input_schema={
-                "type": "object",
-                "properties": {"value": {"type": "string"}},
-                "required": ["value"],
-                "additionalProperties": False,
-            },
-            output_schema={"type": "object", "properties": {}},
-        )
-
-    def test_valid_input_passes(self):
-        validate_input({"value": "hello"}, self._manifest())
+    def test_valid_input_passes(self, default_manifest):
+        validate_input({"value": "hello"}, default_manifest)
 
-    def test_missing_required_blocked(self):
+    def test_missing_required_blocked(self, default_manifest):
         with pytest.raises(ToolInputValidationError, match="required"):
-            validate_input({}, self._manifest())
+            validate_input({}, default_manifest)
 
-    def test_wrong_type_blocked(self):
+    def test_wrong_type_blocked(self, default_manifest):
         with pytest.raises(ToolInputValidationError):
-            validate_input({"value": 123}, self._manifest())
+            validate_input({"value": 123}, default_manifest)
 
-    def test_additional_properties_blocked(self):
+    def test_additional_properties_blocked(self, default_manifest):
         with pytest.raises(ToolInputValidationError):
-            validate_input({"value": "ok", "injected": "evil"}, self._manifest())
+            validate_input({"value": "ok", "injected": "evil"}, default_manifest)
 
 
 @pytest.mark.security
@@ -2,7 +2,7 @@
 
 import pytest
 
-from aria.models.types import SessionRequest, ToolManifest, ToolPermission
+from aria.models.types import SessionRequest, SessionStatus, ToolManifest, ToolPermission
 
 
 class TestToolManifest:
@@ -43,6 +43,18 @@ class TestToolManifest:
                 output_schema={},
             )
 
+    def test_trailing_newline_in_name_rejected(self):
+        with pytest.raises(ValueError, match="invalid"):
+            ToolManifest(
+                name="tool\n",
+                version="1.0.0",
+                description="A test tool for unit testing only.",
+                permissions=frozenset({ToolPermission.NONE}),
+                timeout_seconds=10,
+                input_schema={},
+                output_schema={},
+            )
+
     def test_invalid_version_rejected(self):
         with pytest.raises(ValueError, match="semver"):
             ToolManifest(
@@ -106,6 +118,39 @@ class TestToolManifest:
         with pytest.raises((AttributeError, TypeError)):
             m.name = "other"  # type: ignore
 
+    def test_hashable_despite_dict_schemas(self):
+        def make():
+            return ToolManifest(
+                name="tool",
+                version="1.0.0",
+                description="A test tool for unit testing only.",
+                permissions=frozenset({ToolPermission.NONE}),
+                timeout_seconds=10,
+                input_schema={"type": "object"},
+                output_schema={},
+            )
+
+        a, b = make(), make()
+        assert a == b and hash(a) == hash(b)
+        assert len({a, b}) == 1
+
+    def test_permission_sets_interned(self):
+        def make(perms):
+            return ToolManifest(
+                name="tool",
+                version="1.0.0",
+                description="A test tool for unit testing only.",
+                permissions=perms,
+                timeout_seconds=10,
+                input_schema={},
+                output_schema={},
+            )
+
+        a = make(frozenset({ToolPermission.FILESYSTEM_READ}))
+        b = make({ToolPermission.FILESYSTEM_READ})  # plain set is normalised too
+        assert isinstance(b.permissions, frozenset)
+        assert a.permissions is b.permissions
+
     def test_timeout_out_of_range_rejected(self):
         with pytest.raises(ValueError):
             ToolManifest(
@@ -155,3 +200,17 @@ class TestSessionRequest:
     def test_session_id_is_unique(self):
         r1, r2 = SessionRequest(task="task"), SessionRequest(task="task")
         assert r1.session_id != r2.session_id
+
+
+class TestSessionStatus:
+    def test_values_are_persisted_strings(self):
+        # Stored in sessions.status and audit payloads — must stay stable text, not ints
+        assert [s.value for s in SessionStatus] == [
+            "IDLE",
+            "RUNNING",
+            "WAITING",
+            "DONE",
+            "FAILED",
+            "CANCELLED",
+        ]
+        assert SessionStatus("DONE") is SessionStatus.DONE